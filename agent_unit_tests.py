@@ -10,6 +10,11 @@ from path_utils import PathsController
 from scout_agent import Scout, ExplorePhase
 from worker_agent import Worker, SendingPhase
 from repast4py import space
+from index_utils import DronesIndex
+from positions_utils import DronePositions
+from scout_engine import ScoutEngine
+from connectivity_utils import ConnectivityCache
+
 from mpi4py import MPI
 
 SPEED_DISTANCES = [5, 10, 15]
@@ -64,6 +69,17 @@ class ScoutTests(unittest.TestCase):
 
         self.assertEqual(scout.explore_phase, ExplorePhase.GOING_BACK_TO_START)
 
+    def test_move_back_NextDroneIsNotInDrones_ExplorePhaseIsStuck(self):
+        drones = [Drone(1, 0, dpt(0, 1)), Drone(2, 0, dpt(0, 2))]
+        scout = Scout(0, 0, 0, 2, 100)
+        scout.path = [0, 1, 2]
+        scout.current_drone_index = 1
+        scout.explore_phase = ExplorePhase.GOING_BACK_TO_START
+
+        scout.move_back(drones, SPEED_DISTANCES)
+
+        self.assertEqual(scout.explore_phase, ExplorePhase.STUCK)
+
     def test_move_back_NextDroneIsCanBeReached_MovedTonextDrone(self):
         drones = [Drone(0, 0, dpt(0, 0)), Drone(1, 0, dpt(0, 1)), Drone(2, 0, dpt(0, 2))]
         scout = Scout(0, 0, 0, 2, 100)
@@ -98,6 +114,181 @@ class ScoutTests(unittest.TestCase):
         scout.move_back(drones, SPEED_DISTANCES)
 
         self.assertEqual(scout.explore_phase, ExplorePhase.SCOUTING_ENDED)
+
+    def test_move_back_GoneBackToStart_WayBackDistancesInPathOrder(self):
+        drones = [Drone(0, 0, dpt(0, 0)), Drone(1, 0, dpt(0, 1)), Drone(2, 0, dpt(0, 3))]
+        scout = Scout(0, 0, 0, 2, 100)
+        scout.path = [0, 1, 2]
+        scout.current_drone_index = 2
+        scout.explore_phase = ExplorePhase.GOING_BACK_TO_START
+
+        while scout.move_back(drones, SPEED_DISTANCES):
+            pass
+
+        self.assertListEqual([1, 2], scout.way_back_distances)
+
+    def test_move_forward_PathAssigned_VisitedDronesSkipped(self):
+        drones = [Drone(0, 0, dpt(0, 0)), Drone(1, 0, dpt(0, 1)), Drone(2, 0, dpt(0, 2)), Drone(3, 0, dpt(0, 12))]
+        scout = Scout(0, 0, 0, 3, 100)
+        scout.path = [0, 1]
+        scout.current_drone_index = 1
+
+        scout.move_forward(drones, SPEED_DISTANCES)
+
+        self.assertListEqual([0, 1, 2], scout.path)
+        self.assertSetEqual({0, 1, 2}, scout.visited_drone_ids)
+
+    def test_cluster_drones_by_location_DronesIndex_SameClustersAsDronesList(self):
+        drones = [Drone(i, 0, dpt((i * 7) % 60, (i * 13) % 60)) for i in range(40)]
+        scout = Scout(0, 0, 0, 39, 100)
+        scout.path = [0, 5]
+
+        clustered_by_list = scout.cluster_drones_by_location(drones, dpt(30, 30), SPEED_DISTANCES)
+        clustered_by_index = scout.cluster_drones_by_location(DronesIndex(drones, SPEED_DISTANCES[2]), dpt(30, 30), SPEED_DISTANCES)
+
+        self.assertDictEqual(clustered_by_list, clustered_by_index)
+
+    def test_cluster_next_drones_ConnectivityCache_SameClustersAsDronesList(self):
+        drones = [Drone(i, 0, dpt((i * 7) % 60, (i * 13) % 60)) for i in range(40)]
+        scout = Scout(0, 0, 0, 39, 100)
+        scout.path = [0, 5]
+
+        clustered_by_list = scout.cluster_drones_by_location(drones, drones[17].pt, SPEED_DISTANCES)
+        connectivity = ConnectivityCache(DronesIndex(drones, SPEED_DISTANCES[2]), SPEED_DISTANCES, 39)
+        clustered_by_cache = scout.cluster_next_drones(connectivity, drones[17], SPEED_DISTANCES)
+
+        clustered_by_list['safe'].remove(drones[17])
+        self.assertDictEqual(clustered_by_list, clustered_by_cache)
+
+    def test_move_forward_EndDroneInOtherComponent_ExplorePhaseIsStuck(self):
+        drones = [Drone(0, 0, dpt(0, 0)), Drone(1, 0, dpt(0, 4)), Drone(2, 0, dpt(0, 40))]
+        scout = Scout(0, 0, 0, 2, 100)
+
+        scout.move_forward(ConnectivityCache(drones, SPEED_DISTANCES, 2), SPEED_DISTANCES)
+
+        self.assertEqual(ExplorePhase.STUCK, scout.explore_phase)
+        self.assertListEqual([0], scout.path)
+
+    def test_move_forward_MoreHopsThanEnergy_ExplorePhaseIsStuck(self):
+        drones = [Drone(i, 0, dpt(0, i * 12)) for i in range(5)]
+        scout = Scout(0, 0, 0, 4, 4)
+
+        scout.move_forward(ConnectivityCache(drones, SPEED_DISTANCES, 4), SPEED_DISTANCES)
+
+        self.assertEqual(ExplorePhase.STUCK, scout.explore_phase)
+        self.assertEqual(0, scout.random_stream.counter)
+
+class ScoutEngineTests(unittest.TestCase):
+
+    def test_explore_SafeAndCloseDrones_MovedToSafeDrone(self):
+        drones = [Drone(0, 0, dpt(0, 0)), Drone(1, 0, dpt(0, 4)), Drone(2, 0, dpt(0, 8))]
+        scout = Scout(0, 0, 0, 2, 100)
+        scout_engine = ScoutEngine([scout], 0, 2, 100, 3)
+
+        scout_engine.explore(DronesIndex(drones, SPEED_DISTANCES[2]), SPEED_DISTANCES)
+        scout_engine.update_scouts()
+
+        self.assertListEqual([0, 1], scout.path)
+        self.assertEqual(ExplorePhase.SEARCHING_END_DRONE, scout.explore_phase)
+
+    def test_update_scouts_SampledScouts_OnlySampledScoutsUpdated(self):
+        drones = [Drone(0, 0, dpt(0, 0)), Drone(1, 0, dpt(0, 4)), Drone(2, 0, dpt(0, 8))]
+        scouts = [Scout(0, 0, 0, 2, 100), Scout(1, 0, 0, 2, 100)]
+        scout_engine = ScoutEngine(scouts, 0, 2, 100, 3)
+
+        scout_engine.explore(DronesIndex(drones, SPEED_DISTANCES[2]), SPEED_DISTANCES)
+        scout_engine.update_scouts([scouts[1]])
+
+        self.assertListEqual([0], scouts[0].path)
+        self.assertListEqual([0, 1], scouts[1].path)
+
+    def test_explore_NoSuitableDrones_ExplorePhaseIsStuck(self):
+        drones = [Drone(0, 0, dpt(0, 0)), Drone(1, 0, dpt(0, 20)), Drone(2, 0, dpt(0, 40))]
+        scout = Scout(0, 0, 0, 2, 100)
+        scout_engine = ScoutEngine([scout], 0, 2, 100, 3)
+
+        scout_engine.explore(DronesIndex(drones, SPEED_DISTANCES[2]), SPEED_DISTANCES)
+
+        self.assertTrue(scout_engine.is_scouting_round_ended())
+        self.assertListEqual([], scout_engine.get_found_paths())
+
+    def test_explore_SameScoutsAsAgents_SamePathsAsScoutExplore(self):
+        drones = [Drone(i, 0, dpt((i * 7) % 30, (i * 13) % 30)) for i in range(40)]
+        drones_index = DronesIndex(drones, SPEED_DISTANCES[2])
+        scouts = [Scout(i, 0, 0, 39, 100) for i in range(20)]
+        scout_engine = ScoutEngine([Scout(i, 0, 0, 39, 100) for i in range(20)], 0, 39, 100, 40)
+
+        for _ in range(30):
+            for scout in scouts:
+                scout.explore(drones_index, SPEED_DISTANCES)
+            scout_engine.explore(drones_index, SPEED_DISTANCES)
+
+        self.assertListEqual([scout.path for scout in scouts],
+                             [scout_engine.get_path(i) for i in range(len(scouts))])
+
+    def test_explore_ConnectivityCache_SamePathsAsScoutExplore(self):
+        drones = [Drone(i, 0, dpt((i * 7) % 40, (i * 13) % 40)) for i in range(40)]
+        scouts = [Scout(i, 0, 0, 39, 30) for i in range(20)]
+        scout_engine = ScoutEngine([Scout(i, 0, 0, 39, 30) for i in range(20)], 0, 39, 30, 40)
+        connectivity = ConnectivityCache(DronesIndex(drones, SPEED_DISTANCES[2]), SPEED_DISTANCES, 39)
+
+        for _ in range(30):
+            for scout in scouts:
+                scout.explore(connectivity, SPEED_DISTANCES)
+            scout_engine.explore(connectivity, SPEED_DISTANCES)
+        scout_engine.update_scouts()
+
+        self.assertListEqual([scout.path for scout in scouts], [scout.path for scout in scout_engine.scouts])
+        self.assertListEqual([scout.explore_phase for scout in scouts], [scout.explore_phase for scout in scout_engine.scouts])
+
+    def test_reset_ScoutIds_OnlyThoseScoutsReset(self):
+        drones = [Drone(0, 0, dpt(0, 0)), Drone(1, 0, dpt(0, 4)), Drone(2, 0, dpt(0, 8))]
+        scouts = [Scout(0, 0, 0, 2, 100), Scout(1, 0, 0, 2, 100)]
+        scout_engine = ScoutEngine(scouts, 0, 2, 100, 3)
+        scout_engine.explore(DronesIndex(drones, SPEED_DISTANCES[2]), SPEED_DISTANCES)
+
+        scout_engine.reset(100, {1})
+
+        self.assertListEqual([0, 1], scout_engine.get_path(0))
+        self.assertListEqual([0], scout_engine.get_path(1))
+        scout_engine.explore(DronesIndex(drones, SPEED_DISTANCES[2]), SPEED_DISTANCES)
+        self.assertListEqual([0, 1], scout_engine.get_path(1))
+
+    def test_explore_DronePositions_SamePathsAsScoutExplore(self):
+        drones = [Drone(i, 0, dpt((i * 11) % 50, (i * 17) % 50)) for i in range(60)]
+        scouts = [Scout(i, 0, 0, 59, 100) for i in range(20)]
+        scout_engine = ScoutEngine([Scout(i, 0, 0, 59, 100) for i in range(20)], 0, 59, 100, 60)
+        drone_positions = DronePositions(drones, space.BoundingBox(0, 50, 0, 50, 0, 0))
+
+        for _ in range(30):
+            for scout in scouts:
+                scout.explore(drone_positions, SPEED_DISTANCES)
+            scout_engine.explore(drone_positions, SPEED_DISTANCES)
+            drone_positions.fly(Drone.OFFSETS)
+
+        self.assertListEqual([scout.path for scout in scouts],
+                             [scout_engine.get_path(i) for i in range(len(scouts))])
+
+    def test_get_ended_scouts_EndedAndStuckScouts_ReturnBothWithPaths(self):
+        drones = [Drone(0, 0, dpt(0, 0)), Drone(1, 0, dpt(0, 4)), Drone(2, 0, dpt(0, 8))]
+        scouts = [Scout(0, 0, 0, 2, 100), Scout(1, 0, 0, 2, 1)]
+        scout_engine = ScoutEngine(scouts, 0, 2, 100, 3)
+        scout_engine.energy_limits[1] = 1
+
+        while not scout_engine.is_scouting_round_ended():
+            scout_engine.explore(DronesIndex(drones, SPEED_DISTANCES[2]), SPEED_DISTANCES)
+
+        self.assertListEqual([(0, ExplorePhase.SCOUTING_ENDED, [0, 1, 2], [4.0, 4.0]), (1, ExplorePhase.STUCK, [0], [])],
+                             scout_engine.get_ended_scouts())
+
+    def test_explore_PathToEndDrone_ReturnFoundPathWithWayBackDistances(self):
+        drones = [Drone(0, 0, dpt(0, 0)), Drone(1, 0, dpt(0, 4)), Drone(2, 0, dpt(0, 8))]
+        scout_engine = ScoutEngine([Scout(0, 0, 0, 2, 100)], 0, 2, 100, 3)
+
+        while not scout_engine.is_scouting_round_ended():
+            scout_engine.explore(DronesIndex(drones, SPEED_DISTANCES[2]), SPEED_DISTANCES)
+
+        self.assertListEqual([([0, 1, 2], [4.0, 4.0])], scout_engine.get_found_paths())
     
 class WorkerTests(unittest.TestCase):
 
@@ -142,6 +333,17 @@ class WorkerTests(unittest.TestCase):
 
         self.assertEqual(-2, code_result)
 
+    def test_move_forward_NextDroneIsNotInDrones_SendingPhaseIsStuck(self):
+        drones = [Drone(0, 0, dpt(0, 0)), Drone(1, 0, dpt(0, 1))]
+        paths_controller = PathsController(SPEED_DISTANCES)
+        paths_controller.try_add_path([0, 1, 2], [1, 1])
+        worker = Worker(0, 0, 0, 1, 0, 0, 0)
+
+        code_result = worker.move_forward(drones, 0, paths_controller.paths[0], SPEED_DISTANCES)
+
+        self.assertEqual(-1, code_result)
+        self.assertEqual(worker.sending_phase, SendingPhase.STUCK)
+
     def test_move_back_NextDroneIsReachable_CurrentDroneIdChangedToNextDroneId(self):
         drones = [Drone(0, 0, dpt(0, 0)), Drone(1, 0, dpt(0, 1)), Drone(2, 0, dpt(0, 2))]
         paths_controller = PathsController(SPEED_DISTANCES)
@@ -175,5 +377,27 @@ class WorkerTests(unittest.TestCase):
 
         self.assertEqual(worker.sending_phase, SendingPhase.SENDING_ENDED)
 
+    def test_move_back_GoneBackToStart_WayBackDistancesInPathOrder(self):
+        drones = [Drone(0, 0, dpt(0, 0)), Drone(1, 0, dpt(0, 1)), Drone(2, 0, dpt(0, 3))]
+        paths_controller = PathsController(SPEED_DISTANCES)
+        paths_controller.try_add_path([0, 1, 2], [1, 2])
+        worker = Worker(0, 0, 0, 2, 0, 0, 0)
+        worker.sending_phase = SendingPhase.GOING_BACK_TO_START
+
+        while worker.move_back(drones, 0, paths_controller.paths[0], SPEED_DISTANCES) == 0:
+            pass
+
+        self.assertListEqual([1, 2], worker.way_back_distances)
+
+    def test_move_forward_DronesIndex_CurrentDroneIdChangedToNextDroneId(self):
+        drones = [Drone(0, 0, dpt(0, 0)), Drone(1, 0, dpt(0, 1)), Drone(2, 0, dpt(0, 2))]
+        paths_controller = PathsController(SPEED_DISTANCES)
+        paths_controller.try_add_path([0, 1, 2], [1, 1])
+        worker = Worker(0, 0, 0, 1, 0, 0, 0)
+
+        worker.move_forward(DronesIndex(drones, SPEED_DISTANCES[2]), 0, paths_controller.paths[0], SPEED_DISTANCES)
+
+        self.assertEqual(worker.current_drone_id, 2)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -1,45 +1,118 @@
-from scout_agent import Scout
+from collections import OrderedDict
+from scout_agent import Scout, ExplorePhase
 from drone_agent import Drone
-from worker_agent import Worker
+from worker_agent import Worker, SendingPhase
 from repast4py.space import DiscretePoint as dpt
+from serialization_utils import unpack_scout, unpack_worker
 
 
-agent_cache = {}
-def restore_agent(agent_data):
+class AgentCache:
+
+    def __init__(self, max_size=0) -> None:
+        self.agents = OrderedDict()
+        self.max_size = max_size
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, uid):
+        return uid in self.agents
+
+    def __len__(self):
+        return len(self.agents)
+
+    def get(self, uid):
+        if uid not in self.agents:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.agents.move_to_end(uid)
+        return self.agents[uid]
+
+    def add(self, uid, agent):
+        self.agents[uid] = agent
+        self.agents.move_to_end(uid)
+        while self.max_size > 0 and len(self.agents) > self.max_size:
+            self.agents.popitem(last=False)
+            self.evictions += 1
+
+    def evict(self, uid):
+        if uid in self.agents:
+            del self.agents[uid]
+            self.evictions += 1
+
+    def evict_missing(self, is_present):
+        for uid in [uid for uid in self.agents if not is_present(uid)]:
+            del self.agents[uid]
+            self.evictions += 1
+
+    def clear(self):
+        self.agents.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_stats(self):
+        return (len(self.agents), self.hits, self.misses, self.evictions)
+
+
+def create_agent(uid, agent_data):
+    if uid[1] == Drone.TYPE:
+        return Drone(uid[0], uid[2], dpt(agent_data[1], agent_data[2], 0))
+    elif uid[1] == Scout.TYPE:
+        return Scout(uid[0], uid[2], 0, 0, 0)
+    elif uid[1] == Worker.TYPE:
+        return Worker(uid[0], uid[2], 0, 0, 0, 0, 0)
+    else:
+        return None
+
+
+def update_agent(agent, agent_data):
     uid = agent_data[0]
     if uid[1] == Drone.TYPE:
-        if uid in agent_cache:
-            return agent_cache[uid]
-
-        pt = dpt(agent_data[1], agent_data[2], 0)
-        drone = Drone(uid[0], uid[2], pt)
-        agent_cache[uid] = drone
-        
-        return drone
+        agent.pt = dpt(agent_data[1], agent_data[2], 0)
+        agent.random_stream.counter = agent_data[3]
     elif uid[1] == Scout.TYPE:
-        if uid in agent_cache:
-            return agent_cache[uid]
-    
-        scout = Scout(uid[0], uid[2], agent_data[1], agent_data[2], agent_data[7])
-        scout.path = agent_data[3]
-        scout.way_back_distances = agent_data[4]
-        scout.current_drone_index = agent_data[5]
-        scout.explore_phase = agent_data[6]
-
-        agent_cache[uid] = scout
-
-        return scout
+        start_drone_id, end_drone_id, path, way_back_distances, current_drone_index, explore_phase, energy_limit, random_counter = unpack_scout(agent_data[1])
+        agent.start_drone_id = start_drone_id
+        agent.end_drone_id = end_drone_id
+        # the lists of a cached scout are refilled, not replaced
+        agent.path[:] = path
+        agent.visited_drone_ids.clear()
+        agent.visited_drone_ids.update(path)
+        agent.way_back_distances[:] = way_back_distances
+        agent.current_drone_index = current_drone_index
+        agent.explore_phase = ExplorePhase(explore_phase)
+        agent.energy_limit = energy_limit
+        agent.random_stream.counter = random_counter
     elif uid[1] == Worker.TYPE:
-        if uid in agent_cache:
-            return agent_cache[uid]
-    
-        worker = Worker(uid[0], uid[2], agent_data[1], agent_data[2],
-                        agent_data[3], agent_data[4], agent_data[5])
-        worker.way_back_distances = agent_data[6]
-        worker.sending_phase = agent_data[7]
+        path_id, current_drone_id, data_id, package_id, next_tick_to_move, way_back_distances, sending_phase = unpack_worker(agent_data[1])
+        agent.path_id = path_id
+        agent.current_drone_id = current_drone_id
+        agent.data_id = data_id
+        agent.package_id = package_id
+        agent.next_tick_to_move = next_tick_to_move
+        agent.way_back_distances[:] = way_back_distances
+        agent.sending_phase = SendingPhase(sending_phase)
 
-        agent_cache[uid] = worker
 
-        return worker
-    else:
-        pass
\ No newline at end of file
+agent_cache = AgentCache()
+def restore_agent(agent_data):
+    uid = agent_data[0]
+    agent = agent_cache.get(uid)
+    if agent is None:
+        agent = create_agent(uid, agent_data)
+        if agent is None:
+            return None
+
+        agent_cache.add(uid, agent)
+    elif uid[1] != Drone.TYPE and agent.restored_data == agent_data[1]:
+        # a ghost is sent again every synchronization, mostly unchanged
+        return agent
+
+    update_agent(agent, agent_data)
+    if uid[1] != Drone.TYPE:
+        agent.restored_data = agent_data[1]
+    return agent
\ No newline at end of file
@@ -0,0 +1,81 @@
+class LoadBalancer:
+    """Accumulates the time this rank spends stepping scouts and workers and
+    plans agent moves from the ranks above the mean step time to the ranks
+    below it. Plans are computed from gathered loads, so every rank computes
+    the same plan.
+
+    The balanced mode is not spatially distributed: the grid decomposition is
+    fixed, so balanced agents leave it and every rank gathers all the drones
+    after every drone move. It spreads the scout and worker steps, while the
+    drones cost every rank O(drones) memory and traffic per move.
+
+    Args:
+        comm: the mpi communicator the model is distributed over
+        threshold: the ratio of the maximum to the mean step time above which agents are moved
+    """
+
+    def __init__(self, comm, threshold) -> None:
+        self.comm = comm
+        self.rank = comm.Get_rank()
+        self.threshold = threshold
+
+        self.step_time = 0
+        self.steps_count = 0
+
+    def add_steps(self, step_time, steps_count):
+        self.step_time += step_time
+        self.steps_count += steps_count
+
+    def gather_loads(self, scouts_count, workers_count):
+        loads = self.comm.allgather((self.step_time, self.steps_count, scouts_count, workers_count))
+        self.step_time = 0
+        self.steps_count = 0
+        return loads
+
+    def plan_moves(self, loads):
+        step_times = [load[0] for load in loads]
+        mean_step_time = sum(step_times) / len(loads)
+        if mean_step_time <= 0 or max(step_times) / mean_step_time < self.threshold:
+            return []
+
+        senders = []
+        receivers = []
+        for rank, (step_time, _, scouts_count, workers_count) in enumerate(loads):
+            agents_count = scouts_count + workers_count
+            if step_time > mean_step_time and agents_count > 0:
+                agent_step_time = step_time / agents_count
+                senders.append([rank, min(agents_count, int((step_time - mean_step_time) / agent_step_time)), agent_step_time])
+            elif step_time < mean_step_time:
+                receivers.append([rank, mean_step_time - step_time])
+
+        senders.sort(key=lambda sender: (-sender[1], sender[0]))
+        receivers.sort(key=lambda receiver: (-receiver[1], receiver[0]))
+
+        moves = []
+        for sender in senders:
+            for receiver in receivers:
+                if sender[1] <= 0:
+                    break
+
+                count = min(sender[1], int(receiver[1] / sender[2]))
+                if count <= 0:
+                    continue
+
+                moves.append((sender[0], receiver[0], count))
+                sender[1] -= count
+                receiver[1] -= count * sender[2]
+
+        return moves
+
+    def get_agents_to_move(self, moves, agents):
+        agents_to_move = []
+        agents = list(agents)
+        for from_rank, to_rank, count in moves:
+            if from_rank != self.rank:
+                continue
+
+            for agent in agents[len(agents) - count:]:
+                agents_to_move.append((agent.uid, to_rank))
+            agents = agents[:len(agents) - count]
+
+        return agents_to_move
@@ -1,4 +1,7 @@
+import time
 from typing import Dict, Type
+from itertools import cycle
+from math import ceil
 from mpi4py import MPI
 
 from repast4py import core, random, space, schedule, logging, parameters
@@ -9,8 +12,21 @@ from data_utils import DataController
 
 from scout_agent import ExplorePhase
 from path_utils import PathsController
-from agent_utils import restore_agent, Scout, Drone, Worker
+from agent_utils import restore_agent, agent_cache, Scout, Drone, Worker
 from params_utils import check_params
+from index_utils import DronesIndex
+from connectivity_utils import ConnectivityCache
+from repair_utils import PathRepair
+from positions_utils import DronePositions
+from scout_engine import ScoutEngine
+from log_utils import BufferedLogger
+from schedule_utils import WorkerScheduler
+import rng_utils
+from rng_utils import RandomStream
+from distributed_utils import SharedEvents, is_in_bounds, get_buffer_agents, gather_drones, gather_point
+from balance_utils import LoadBalancer
+from metrics_utils import MetricsCollector
+from profile_utils import PhaseProfiler, MessageCounter
 
 
 class Model:
@@ -28,70 +44,264 @@ class Model:
     def __init__(self, comm: MPI.Intracomm, params: Dict):
         self.runner = schedule.init_schedule_runner(comm)
 
-        self.runner.schedule_repeating_event(1, params['data.generate_period'], self.generate_data)
-        self.runner.schedule_repeating_event(1, params['drone.move_period'], self.move_drones)
-        self.runner.schedule_repeating_event(1, 1, self.move_scouts)
-        self.runner.schedule_repeating_event(1, 1, self.log_agents)
+        self.profiler = None
+        if params['profile.enabled']:
+            self.profiler = PhaseProfiler()
+            for phase in ('generate_data', 'move_drones', 'move_scouts', 'move_workers', 'move_worker',
+                          'log_agents', 'balance_load', 'synchronize'):
+                setattr(self, phase, self.profiler.wrap(phase, getattr(self, phase)))
+
+        # ranks draw different amounts of random numbers in distributed mode, so shuffling
+        # events of the same tick would run the collective operations in a different order
+        priority_type = schedule.PriorityType.FIRST if params['world.distributed'] else schedule.PriorityType.RANDOM
+        self.runner.schedule_repeating_event(1, params['data.generate_period'], self.generate_data, priority_type=priority_type)
+        self.runner.schedule_repeating_event(1, params['drone.move_period'], self.move_drones, priority_type=priority_type)
+        self.runner.schedule_repeating_event(1, 1, self.move_scouts, priority_type=priority_type)
+        self.runner.schedule_repeating_event(1, 1, self.move_workers, priority_type=priority_type)
+        self.runner.schedule_repeating_event(1, 1, self.log_agents, priority_type=priority_type)
+        if params['load_balance.period'] > 0:
+            self.runner.schedule_repeating_event(params['load_balance.period'], params['load_balance.period'],
+                                                 self.balance_load, priority_type=priority_type)
+        if self.profiler is not None:
+            self.runner.schedule_repeating_event(1, 1, self.log_profile, priority_type=schedule.PriorityType.LAST)
         self.runner.schedule_end_event(self.at_end)
 
+        self.params = params
+        self.comm = comm
         self.context = ctx.SharedContext(comm)
-
-        box = space.BoundingBox(0, params['world.width'], 0, params['world.height'], 0, 0)
-        self.grid = space.SharedGrid(name='grid', bounds=box, borders=space.BorderType.Sticky,
-                                     occupancy=space.OccupancyType.Multiple, buffer_size=2, comm=comm)
+        if self.profiler is not None:
+            sample_period = params['profile.message_sample_period']
+            self.comm = MessageCounter(comm, self.profiler.add_bytes, sample_period)
+            self.context.comm = MessageCounter(self.context.comm, self.profiler.add_bytes, sample_period)
+        self.is_distributed = params['world.distributed']
+        # balanced scouts and workers can live on any rank, so they leave the grid and use a gathered drones index
+        self.is_following_drones = self.is_distributed and params['load_balance.period'] <= 0
+        # load balancing spreads the scout and worker steps, not the world: every rank gathers a replica of all the
+        # drones after every drone move, so like a single rank it holds all the drones in its drones index
+        self.has_all_drones = comm.Get_size() == 1 or params['load_balance.period'] > 0
+
+        self.buffer_size = 2
+        if self.is_distributed:
+            self.buffer_size = max(self.buffer_size, ceil(params['drone.drone_radius_distance']))
+
+        self.box = space.BoundingBox(0, params['world.width'], 0, params['world.height'], 0, 0)
+        self.grid = space.SharedGrid(name='grid', bounds=self.box, borders=space.BorderType.Sticky,
+                                     occupancy=space.OccupancyType.Multiple, buffer_size=self.buffer_size, comm=comm)
         self.context.add_projection(self.grid)
+        if self.profiler is not None:
+            # the grid exchanges its ghosts over a cartesian communicator that cannot be replaced
+            self.grid._fill_send_data = self.context.comm.wrap_sender('grid.alltoall', self.grid._fill_send_data)
 
         self.rank = comm.Get_rank()
-        rng = repast4py.random.default_rng
+        self.comm_size = comm.Get_size()
+        rng_utils.init(params['random.seed'])
+        local_bounds = self.grid.get_local_bounds()
+        placement_bounds = self.box if self.is_distributed else local_bounds
         drones = []
         for i in range(params['drone.count']):
-            pt = self.grid.get_random_local_pt(rng)
+            random_stream = RandomStream(Drone.TYPE, i)
+            x = placement_bounds.xmin + random_stream.randrange(placement_bounds.xextent)
+            y = placement_bounds.ymin + random_stream.randrange(placement_bounds.yextent)
+            if not is_in_bounds(local_bounds, x, y):
+                continue
+
+            pt = dpt(x, y, 0)
             drone = Drone(i, self.rank, pt)
+            drone.random_stream = random_stream
             drones.append(drone)
             self.context.add(drone)
             self.grid.move(drone, pt)
 
-        self.start_drone_id, self.end_drone_id = drones[0].id, drones[-1].id
-
-        self.drone_logger = logging.TabularLogger(comm, params['drone_log_file'], ['tick', 'drone_id', 'pos_x', 'pos_y', 'is_start', 'is_end'])
-        self.scout_logger = logging.TabularLogger(comm, params['scout_log_file'], ['tick', 'scout_id', 'drone_id', 'pos_x', 'pos_y', 'explore_phase'])
-        self.worker_logger = logging.TabularLogger(comm, params['worker_log_file'], ['tick', 'worker_id', 'drone_id', 'pos_x', 'pos_y', 'sending_phase'])
-        self.data_state_logger = logging.TabularLogger(comm, params['data_state_log_file'], ['tick', 'data_id', 'package_id', 'state', 'worker_id'])
-        self.paths_count_logger = logging.TabularLogger(comm, params['paths_count_log_file'], ['tick', 'paths_count'])
-        self.scouting_logger = logging.TabularLogger(comm, params['scouting_log_file'], ['tick', 'paths_count'])
+        if self.is_distributed:
+            self.start_drone_id, self.end_drone_id = 0, params['drone.count'] - 1
+            start_drone_rank = self.comm.allreduce(self.rank if len(drones) > 0 and drones[0].id == self.start_drone_id else -1, op=MPI.MAX)
+            self.start_drone_uid = (self.start_drone_id, Drone.TYPE, start_drone_rank)
+        else:
+            self.start_drone_id, self.end_drone_id = drones[0].id, drones[-1].id
+            self.start_drone_uid = drones[0].uid
+
+        self.drone_positions = None
+        if params['drone.vectorized_positions']:
+            if self.comm_size == 1:
+                self.drone_positions = DronePositions(drones, self.box)
+            elif self.rank == 0:
+                print('drone.vectorized_positions is supported only on a single rank, ignored')
+
+        self.drone_logger = self.create_logger(comm, params['drone_log_file'], ['tick', 'drone_id', 'pos_x', 'pos_y', 'is_start', 'is_end'])
+        self.scout_logger = self.create_logger(comm, params['scout_log_file'], ['tick', 'scout_id', 'drone_id', 'pos_x', 'pos_y', 'explore_phase'])
+        self.worker_logger = self.create_logger(comm, params['worker_log_file'], ['tick', 'worker_id', 'drone_id', 'pos_x', 'pos_y', 'sending_phase'])
+        self.data_state_logger = self.create_logger(comm, params['data_state_log_file'], ['tick', 'data_id', 'package_id', 'state', 'worker_id'])
+        self.paths_count_logger = self.create_logger(comm, params['paths_count_log_file'], ['tick', 'paths_count'])
+        self.scouting_logger = self.create_logger(comm, params['scouting_log_file'], ['tick', 'paths_count'])
+        self.agent_cache_logger = self.create_logger(comm, params['agent_cache_log_file'], ['tick', 'rank', 'size', 'hits', 'misses', 'evictions'])
+        self.summary_logger = self.create_logger(comm, params['summary_log_file'], ['metric', 'value'])
+
+        agent_cache.clear()
+        agent_cache.max_size = params['agent_cache.max_size']
 
         self.scout_energy_limit = params['scout.energy_limit']
-        for i in range(params['scout.count']):
-            scout = Scout(i, self.rank, self.start_drone_id, self.end_drone_id, self.scout_energy_limit)
-            self.context.add(scout)
+        scouts = []
+        start_drone = self.context.agent(self.start_drone_uid)
+        if start_drone is not None:
+            for i in range(params['scout.count']):
+                scout = Scout(i, self.rank, self.start_drone_id, self.end_drone_id, self.scout_energy_limit)
+                scouts.append(scout)
+                self.context.add(scout)
+                if self.is_following_drones:
+                    self.grid.move(scout, start_drone.pt)
+
+        self.is_scouting_continuous = params['scout.continuous']
+        # [runs, found paths, accepted paths, stuck runs] by scout id, the same on every rank
+        self.scout_stats = {}
+        self.scout_end_ticks = {}
+        if self.is_scouting_continuous:
+            self.scout_stats_logger = self.create_logger(comm, params['scout_stats_log_file'],
+                                                         ['scout_id', 'runs', 'found_paths', 'accepted_paths', 'stuck_runs'])
+
+        self.scout_engine = None
+        if params['scout.batched']:
+            self.scout_engine = ScoutEngine(scouts, self.start_drone_id, self.end_drone_id,
+                                            self.scout_energy_limit, params['drone.count'])
 
         self.paths = []
         self.new_path_id = 0
-        self.params = params
-      
-
-        self.log_agents()
 
         self.speed_distances = [params['drone.stable_sending_speed_max_distance'],
                                 params['drone.close_to_disconnect_radius_distance'],
                                 params['drone.drone_radius_distance']]
+        self.drones_index = None
+        self.is_connectivity_cached = params['drone.connectivity_cache']
+        if self.is_connectivity_cached and not self.has_all_drones:
+            self.is_connectivity_cached = False
+            if self.rank == 0:
+                print('drone.connectivity_cache needs all drones in the drones index of every rank, they are only there on a single rank or in the replica of load_balance.period, ignored')
         self.paths_controller = PathsController(self.speed_distances)
+        self.is_path_health_checked = params['path.health_check']
+        if self.is_path_health_checked:
+            self.path_health_logger = self.create_logger(comm, params['path_health_log_file'],
+                                                         ['tick', 'usable_paths', 'evaluated', 'broken', 'not_found', 'usable_after', 'mean_speed'])
+        self.paths_drones_index = None
+        self.is_path_repaired = params['path.repair_scouts'] > 0
+        self.path_repairs = {}
+        self.new_repair_scout_id = 0
+        if self.is_path_repaired:
+            self.path_repair_logger = self.create_logger(comm, params['path_repair_log_file'],
+                                                         ['tick', 'path_id', 'is_repaired', 'detour_hops', 'scout_steps'])
         self.data_controller = DataController()
+        self.metrics = MetricsCollector(lambda: self.runner.schedule.tick)
+        self.data_controller.on_package_state_changed = self.metrics.update_package_state
+        self.metrics.get_paths_submissions = lambda: (self.paths_controller.submitted_paths_count,
+                                                      self.paths_controller.duplicate_paths_count)
         self.new_worker_id = 0
+        self.worker_scheduler = WorkerScheduler()
+
+        self.shared_events = None
+        if self.is_distributed:
+            self.shared_events = SharedEvents(self.comm, self.data_controller, self.paths_controller)
+            self.paths_controller.on_connection_business_changed = self.shared_events.set_connection_business
+        self.is_log_rank = not self.is_distributed or self.rank == 0
+
+        self.load_balancer = None
+        if params['load_balance.period'] > 0:
+            self.load_balancer = LoadBalancer(self.comm, params['load_balance.threshold'])
+            self.load_logger = self.create_logger(comm, params['load_log_file'], ['tick', 'rank', 'step_time', 'steps', 'scouts', 'workers', 'moved_agents'])
+            self.drones_index = self.cache_connectivity(DronesIndex(gather_drones(self.comm, drones), self.speed_distances[2]))
+        if self.profiler is not None:
+            self.profile_logger = self.create_logger(comm, params['profile_log_file'], ['tick', 'rank', 'phase', 'time', 'calls', 'sent_bytes'])
+            self.profile_summary_logger = self.create_logger(comm, params['profile_summary_log_file'],
+                                                             ['rank', 'phase', 'time', 'calls', 'sent_bytes', 'time_share'])
         self.package_count_delivered = 0
         self.package_count_lost = 0
 
+        self.log_agents()
+
+    def create_logger(self, comm, fpath, headers):
+        return BufferedLogger(comm, fpath, headers, self.params['log.format'],
+                              self.params['log.flush_rows'], self.params['log.flush_period'],
+                              lambda: self.runner.schedule.tick)
+
+    def get_local_agents(self, agent_type):
+        try:
+            return self.context.agents(agent_type)
+        except KeyError:
+            return []
+
     def drone_agents_to_list(self):
-        return [drone for drone in self.context.agents(Drone.TYPE)]
+        return [drone for drone in self.get_local_agents(Drone.TYPE)]
+
+    def get_drones_index(self):
+        if self.drones_index is None:
+            if self.drone_positions is not None:
+                drones_index = self.drone_positions
+            else:
+                drones = self.drone_agents_to_list()
+                if self.is_distributed:
+                    drones.extend(get_buffer_agents(self.grid, Drone.TYPE, self.buffer_size, self.box))
+                drones_index = DronesIndex(drones, self.speed_distances[2])
+            self.drones_index = self.cache_connectivity(drones_index)
+
+        return self.drones_index
+
+    def cache_connectivity(self, drones_index):
+        # the index is rebuilt only after the drones move, so the cache lives for one drone-move epoch
+        if not self.is_connectivity_cached:
+            return drones_index
+
+        return ConnectivityCache(drones_index, self.speed_distances, self.end_drone_id)
+
+    def synchronize(self):
+        if self.scout_engine is not None and self.comm_size > 1:
+            self.scout_engine.update_scouts()
+
+        self.context.synchronize(restore_agent)
+        if self.comm_size > 1:
+            # the agents restored here which moved on or stopped being ghosts are not kept for their next visit
+            agent_cache.evict_missing(lambda uid: self.context.agent(uid) is not None or self.context.ghost_agent(uid) is not None)
+        if self.shared_events is not None:
+            self.shared_events.exchange()
+        elif self.comm_size > 1:
+            self.drones_index = None
+
+    def move_to_drone(self, agent, drone_id):
+        if not self.is_following_drones:
+            return
+
+        drone = self.get_drones_index().find(drone_id)
+        if drone is not None:
+            self.grid.move(agent, drone.pt)
+
+    def reschedule_workers(self):
+        if self.is_distributed:
+            self.worker_scheduler.reschedule(self.get_local_agents(Worker.TYPE))
+
+    def set_package_state(self, data_id, package_id, package_state):
+        if self.shared_events is not None:
+            self.shared_events.set_package_state(data_id, package_id, package_state)
+        else:
+            self.data_controller.datas[data_id].packages[package_id].package_state = package_state
+
+    def set_path_unusable(self, path_id):
+        if self.shared_events is not None:
+            self.shared_events.set_path_unusable(path_id)
+        else:
+            self.paths_controller.paths[path_id].is_can_be_used = False
+
+    def update_path_distances(self, path_id, distances):
+        if self.shared_events is not None:
+            self.shared_events.update_path_distances(path_id, distances)
+        else:
+            self.paths_controller.update_path_distances(path_id, distances)
 
     def generate_data(self):
         if len(self.data_controller.datas.keys()) >= self.params['data.count']:
             return
 
         generated_data = self.data_controller.add_data(self.params['data.size'])
+        self.metrics.add_data(generated_data)
 
-        for package in generated_data.packages.values():
-            self.data_state_logger.log_row(self.runner.schedule.tick, generated_data.data_id, package.package_id, package.package_state, -1)
+        if self.is_log_rank:
+            for package in generated_data.packages.values():
+                self.data_state_logger.log_row(self.runner.schedule.tick, generated_data.data_id, package.package_id, package.package_state, -1)
 
         self.data_state_logger.write()
 
@@ -107,106 +317,394 @@ class Model:
         if len(can_be_used_paths) <= 0:
             return
 
-        while len(packages) > 0:
-            for path in can_be_used_paths:
-                data_id, package = packages.pop(0)
-                worker = Worker(self.new_worker_id, self.rank,
-                                path.path_id, self.start_drone_id,
-                                data_id, package.package_id,
-                                self.runner.schedule.tick)
-                package.package_state = 1
-                self.new_worker_id += 1
-                self.context.add(worker)
+        workers = []
+        start_drone = self.context.agent(self.start_drone_uid)
+        if start_drone is None:
+            packages = []
+
+        for (data_id, package), path in zip(packages, cycle(can_be_used_paths)):
+            worker = Worker(self.new_worker_id, self.rank,
+                            path.path_id, self.start_drone_id,
+                            data_id, package.package_id,
+                            self.runner.schedule.tick)
+            self.set_package_state(data_id, package.package_id, 1)
+            self.new_worker_id += 1
+            self.context.add(worker)
+            self.move_to_drone(worker, self.start_drone_id)
+            workers.append(worker)
 
-                self.data_state_logger.log_row(self.runner.schedule.tick, data_id, package.package_id, package.package_state, worker.id)
-                self.data_state_logger.write()
+            self.data_state_logger.log_row(self.runner.schedule.tick, data_id, package.package_id, package.package_state, worker.id)
+
+        self.data_state_logger.write()
+        self.synchronize()
 
-                self.context.synchronize(restore_agent)
-                self.move_worker(worker)
+        for worker in workers:
+            self.move_worker(worker)
 
+        self.synchronize()
+        self.reschedule_workers()
+        self.stop_if_all_packages_delivered_or_lost()
 
     def move_drones(self):
-        for drone in self.context.agents(Drone.TYPE):
-            drone.fly(self.grid)
+        if self.drone_positions is not None:
+            # the table is what the model reads, the grid still follows it for anything reading agent locations
+            for row in self.drone_positions.fly(Drone.OFFSETS):
+                drone = self.drone_positions.drones[row]
+                self.grid.move(drone, drone.pt)
+        else:
+            for drone in self.get_local_agents(Drone.TYPE):
+                drone.fly(self.grid)
+
+        self.synchronize()
+        self.drones_index = None
+        self.paths_drones_index = None
+
+        if self.load_balancer is not None:
+            self.drones_index = self.cache_connectivity(DronesIndex(gather_drones(self.comm, self.get_local_agents(Drone.TYPE)), self.speed_distances[2]))
+        elif self.is_distributed:
+            for scout in self.get_local_agents(Scout.TYPE):
+                self.move_to_drone(scout, scout.path[scout.current_drone_index])
+            for worker in self.get_local_agents(Worker.TYPE):
+                self.move_to_drone(worker, worker.current_drone_id)
+
+            self.synchronize()
+            self.reschedule_workers()
+
+        if self.is_path_health_checked:
+            self.check_paths_health()
+
+    def get_paths_drones_index(self):
+        if self.has_all_drones or not self.is_distributed:
+            return self.get_drones_index()
+
+        # the paths are shared by all ranks in distributed mode, so every rank checks and repairs them against all
+        # the drones, gathered once per drone move by the health check
+        if self.paths_drones_index is None:
+            self.paths_drones_index = DronesIndex(gather_drones(self.comm, self.get_local_agents(Drone.TYPE)), self.speed_distances[2])
+
+        return self.paths_drones_index
+
+    def check_paths_health(self):
+        drones = self.get_paths_drones_index()
+
+        checked_paths = self.paths_controller.get_paths_can_be_used()
+        usable_paths_count = len(checked_paths)
+        evaluated_count, broken_count, not_found_count = self.paths_controller.update_paths_health(drones)
+        if self.is_path_repaired:
+            self.start_path_repairs([path for path in checked_paths if not path.is_can_be_used])
+
+        usable_paths = self.paths_controller.get_paths_can_be_used()
+        mean_speed = sum(path.speed for path in usable_paths) / len(usable_paths) if len(usable_paths) > 0 else 0.0
+        if self.is_log_rank:
+            self.path_health_logger.log_row(self.runner.schedule.tick, usable_paths_count, evaluated_count, broken_count,
+                                            not_found_count, len(usable_paths), mean_speed)
+        self.path_health_logger.write()
+
+    def start_path_repairs(self, broken_paths):
+        # a repair lasts one drone-move epoch, the detours its scouts search for are stale after the drones move
+        for path_id, path_repair in self.path_repairs.items():
+            self.log_path_repair(path_id, False, path_repair)
+
+        self.path_repairs = {}
+        for path in broken_paths:
+            self.path_repairs[path.path_id] = PathRepair(path, self.new_repair_scout_id, self.params['path.repair_scouts'],
+                                                         self.params['path.repair_energy_limit'], self.speed_distances)
+            self.new_repair_scout_id += self.path_repairs[path.path_id].scouts_count
+
+    def repair_paths(self):
+        if len(self.path_repairs) == 0:
+            return
 
-        self.context.synchronize(restore_agent)
+        # a path is replaced only when no worker is on it, the workers know the drones of the path they were sent on
+        busy_path_ids = set(worker.path_id for worker in self.get_local_agents(Worker.TYPE))
+        if self.is_distributed:
+            busy_path_ids = set().union(*self.comm.allgather(busy_path_ids))
+
+        is_any_repaired = False
+        for path_id, path_repair in list(self.path_repairs.items()):
+            # the path was replaced meanwhile, by a worker coming back or by a path found by the scouts
+            if self.paths_controller.paths[path_id] is not path_repair.path:
+                self.log_path_repair(path_id, False, path_repair)
+                del self.path_repairs[path_id]
+                continue
+
+            path_repair.explore(self.get_paths_drones_index())
+            repaired_path = path_repair.get_repaired_path()
+            if repaired_path is None and not path_repair.is_ended():
+                continue
+            if repaired_path is not None and path_id in busy_path_ids:
+                continue
+
+            is_repaired = repaired_path is not None and self.paths_controller.try_repair_path(path_id, *repaired_path)
+            self.log_path_repair(path_id, is_repaired, path_repair)
+            del self.path_repairs[path_id]
+            is_any_repaired |= is_repaired
+
+        self.path_repair_logger.write()
+        if is_any_repaired:
+            self.try_create_workers()
+
+    def log_path_repair(self, path_id, is_repaired, path_repair):
+        if self.is_log_rank:
+            detour_hops = path_repair.detour_hops if is_repaired else 0
+            self.path_repair_logger.log_row(self.runner.schedule.tick, path_id, is_repaired, detour_hops, path_repair.steps_count)
+
+    def is_scouting_round_ended(self):
+        if self.scout_engine is not None:
+            return self.scout_engine.is_scouting_round_ended()
+
+        is_ended = True
+        for scout in self.get_local_agents(Scout.TYPE):
+            if scout.explore_phase == ExplorePhase.SEARCHING_END_DRONE or scout.explore_phase == ExplorePhase.GOING_BACK_TO_START:
+                is_ended = False
+                break
 
-    def move_scouts(self):
-        for scout in self.context.agents(Scout.TYPE):
-            scout.explore(self.drone_agents_to_list(), self.speed_distances)
+        if self.is_distributed:
+            return self.comm.allreduce(is_ended, op=MPI.LAND)
 
-        self.context.synchronize(restore_agent)
+        return is_ended
 
-        for scout in self.context.agents(Scout.TYPE):
-            if scout.explore_phase == ExplorePhase.SEARCHING_END_DRONE or scout.explore_phase == ExplorePhase.GOING_BACK_TO_START:
-                return
+    def get_found_paths(self):
+        if self.scout_engine is not None:
+            return self.scout_engine.get_found_paths()
 
-        path_found = 0
-        for scout in self.context.agents(Scout.TYPE):
+        found_paths = []
+        for scout in self.get_local_agents(Scout.TYPE):
             if scout.explore_phase == ExplorePhase.SCOUTING_ENDED:
-                self.paths_controller.try_add_path(scout.path, scout.way_back_distances)
-                path_found += 1
+                found_paths.append((scout.id, scout.path, scout.way_back_distances))
+
+        if self.is_distributed:
+            found_paths = sorted(found_path for rank_found_paths in self.comm.allgather(found_paths) for found_path in rank_found_paths)
+
+        return [(path, way_back_distances) for _, path, way_back_distances in found_paths]
+
+    def reset_scouts(self, scout_ids=None):
+        if self.scout_engine is not None:
+            self.scout_engine.reset(self.scout_energy_limit, scout_ids)
+            return
+
+        start_pt = None
+        if self.is_following_drones:
+            start_drone = self.context.agent(self.start_drone_uid)
+            start_pt = gather_point(self.comm, None if start_drone is None else start_drone.pt)
+
+        for scout in self.get_local_agents(Scout.TYPE):
+            if scout_ids is not None and scout.id not in scout_ids:
+                continue
 
             scout.reset(self.scout_energy_limit)
+            if start_pt is not None:
+                self.grid.move(scout, start_pt)
+
+    def get_ended_scouts(self):
+        if self.scout_engine is not None:
+            return self.scout_engine.get_ended_scouts()
+
+        ended_scouts = []
+        for scout in self.get_local_agents(Scout.TYPE):
+            if scout.explore_phase == ExplorePhase.SCOUTING_ENDED or scout.explore_phase == ExplorePhase.STUCK:
+                ended_scouts.append((scout.id, scout.explore_phase, scout.path, scout.way_back_distances))
+
+        if self.is_distributed:
+            ended_scouts = [ended_scout for rank_ended_scouts in self.comm.allgather(ended_scouts) for ended_scout in rank_ended_scouts]
+
+        return ended_scouts
+
+    def restart_ended_scouts(self):
+        tick = self.runner.schedule.tick
+        ended_scouts = self.get_ended_scouts()
+        for scout_id, _, _, _ in ended_scouts:
+            self.scout_end_ticks.setdefault(scout_id, tick)
+
+        # the scouts that waited longest submit first, at most scout.paths_per_tick paths a tick
+        ended_scouts.sort(key=lambda ended_scout: (self.scout_end_ticks[ended_scout[0]], ended_scout[0]))
+        paths_per_tick = self.params['scout.paths_per_tick']
+
+        path_found = 0
+        restarted_scout_ids = set()
+        for scout_id, explore_phase, path, way_back_distances in ended_scouts:
+            scout_stats = self.scout_stats.setdefault(scout_id, [0, 0, 0, 0])
+            if explore_phase == ExplorePhase.SCOUTING_ENDED:
+                if paths_per_tick > 0 and path_found >= paths_per_tick:
+                    continue
+
+                is_accepted = self.paths_controller.try_add_path(path, way_back_distances)
+                path_found += 1
+                scout_stats[1] += 1
+                scout_stats[2] += int(is_accepted)
+            else:
+                scout_stats[3] += 1
+
+            scout_stats[0] += 1
+            del self.scout_end_ticks[scout_id]
+            restarted_scout_ids.add(scout_id)
+
+        if len(restarted_scout_ids) == 0:
+            return
 
-        self.scouting_logger.log_row(self.runner.schedule.tick, path_found)
-        self.paths_count_logger.log_row(self.runner.schedule.tick, len(self.paths_controller.get_paths_can_be_used()))
+        self.reset_scouts(restarted_scout_ids)
+        self.synchronize()
+
+        if path_found == 0:
+            return
+
+        self.metrics.add_scouting_stage(path_found)
+        if self.is_log_rank:
+            self.scouting_logger.log_row(tick, path_found)
+            self.paths_count_logger.log_row(tick, len(self.paths_controller.get_paths_can_be_used()))
+
+        self.scouting_logger.write()
+        self.paths_count_logger.write()
+
+        self.try_create_workers()
+
+    def move_scouts(self):
+        if self.scout_engine is not None:
+            self.scout_engine.explore(self.get_drones_index(), self.speed_distances)
+        else:
+            start_time = time.perf_counter()
+            steps_count = 0
+            for scout in self.get_local_agents(Scout.TYPE):
+                scout.explore(self.get_drones_index(), self.speed_distances)
+                self.move_to_drone(scout, scout.path[scout.current_drone_index])
+                steps_count += 1
+
+            if self.load_balancer is not None:
+                self.load_balancer.add_steps(time.perf_counter() - start_time, steps_count)
+
+        self.synchronize()
+
+        if self.is_path_repaired:
+            self.repair_paths()
+
+        if self.is_scouting_continuous:
+            self.restart_ended_scouts()
+            return
+
+        if not self.is_scouting_round_ended():
+            return
+
+        path_found = 0
+        for path, way_back_distances in self.get_found_paths():
+            self.paths_controller.try_add_path(path, way_back_distances)
+            path_found += 1
+
+        self.reset_scouts()
+        self.metrics.add_scouting_stage(path_found)
+
+        if self.is_log_rank:
+            self.scouting_logger.log_row(self.runner.schedule.tick, path_found)
+            self.paths_count_logger.log_row(self.runner.schedule.tick, len(self.paths_controller.get_paths_can_be_used()))
 
         self.scouting_logger.write()
         self.paths_count_logger.write()
         
-        self.context.synchronize(restore_agent)
+        self.synchronize()
 
         self.try_create_workers()
 
 
     def move_worker(self, worker):
-        code_result = worker.send(self.drone_agents_to_list(), self.runner.schedule.tick, self.paths_controller, self.speed_distances)
+        code_result = worker.send(self.get_drones_index(), self.runner.schedule.tick, self.paths_controller, self.speed_distances)
 
         if code_result == 0:
-            self.runner.schedule_event(worker.next_tick_to_move, lambda: self.move_worker(worker))
+            self.move_to_drone(worker, worker.current_drone_id)
+            self.worker_scheduler.add(worker)
         elif code_result == -1:
-            self.paths_controller.paths[worker.path_id].is_can_be_used = False
-            self.data_controller.datas[worker.data_id].packages[worker.package_id].package_state = -1
+            self.set_path_unusable(worker.path_id)
+            self.set_package_state(worker.data_id, worker.package_id, -1)
 
             self.data_state_logger.log_row(self.runner.schedule.tick, worker.data_id, worker.package_id, -1, worker.id)
             self.paths_count_logger.log_row(self.runner.schedule.tick, len(self.paths_controller.get_paths_can_be_used()))
             self.data_state_logger.write()
             self.paths_count_logger.write()
 
-            self.context.remove(worker)
+            self.remove_worker(worker)
         elif code_result == -2:
-            self.runner.schedule_event(self.runner.schedule.tick + 1, lambda: self.move_worker(worker))
+            self.worker_scheduler.retry(worker)
         elif code_result == -3:
-            self.paths_controller.update_path_distances(worker.path_id, worker.way_back_distances)
-            self.data_controller.datas[worker.data_id].packages[worker.package_id].package_state = 2
+            self.update_path_distances(worker.path_id, worker.way_back_distances)
+            self.set_package_state(worker.data_id, worker.package_id, 2)
 
             self.data_state_logger.log_row(self.runner.schedule.tick, worker.data_id, worker.package_id, 2, worker.id)
             self.data_state_logger.write()
 
-            self.context.remove(worker)
+            self.remove_worker(worker)
         elif code_result == -4:
-            self.paths_controller.paths[worker.path_id].is_can_be_used = False
-            self.data_controller.datas[worker.data_id].packages[worker.package_id].package_state = 2
+            self.set_path_unusable(worker.path_id)
+            self.set_package_state(worker.data_id, worker.package_id, 2)
 
             self.data_state_logger.log_row(self.runner.schedule.tick, worker.data_id, worker.package_id, 2, worker.id)
             self.paths_count_logger.log_row(self.runner.schedule.tick, len(self.paths_controller.get_paths_can_be_used()))
             self.data_state_logger.write()
             self.paths_count_logger.write()
 
-            self.context.remove(worker)
+            self.remove_worker(worker)
         else:
             print('Unknown code_result', code_result)
 
-        self.context.synchronize(restore_agent)
+    def remove_worker(self, worker):
+        self.context.remove(worker)
+        agent_cache.evict(worker.uid)
 
+    def move_workers(self):
+        workers = self.worker_scheduler.pop_due_workers(self.runner.schedule.tick)
+        if len(workers) == 0 and not self.is_distributed:
+            return
+
+        start_time = time.perf_counter()
+        for worker in workers:
+            self.move_worker(worker)
+
+        if self.load_balancer is not None:
+            self.load_balancer.add_steps(time.perf_counter() - start_time, len(workers))
+
+        self.synchronize()
+        self.reschedule_workers()
+        self.stop_if_all_packages_delivered_or_lost()
+
+    def balance_load(self):
+        scouts = list(self.get_local_agents(Scout.TYPE))
+        workers = list(self.get_local_agents(Worker.TYPE))
+        loads = self.load_balancer.gather_loads(len(scouts), len(workers))
+        moves = self.load_balancer.plan_moves(loads)
+
+        if self.is_log_rank:
+            for rank, (step_time, steps_count, scouts_count, workers_count) in enumerate(loads):
+                moved_agents = sum(count for from_rank, _, count in moves if from_rank == rank)
+                self.load_logger.log_row(self.runner.schedule.tick, rank, step_time, steps_count, scouts_count, workers_count, moved_agents)
+            self.load_logger.write()
+
+        if len(moves) == 0:
+            return
+
+        self.context.move_agents(self.load_balancer.get_agents_to_move(moves, scouts + workers), restore_agent)
+        self.reschedule_workers()
+
+    def stop_if_all_packages_delivered_or_lost(self):
         if len(self.data_controller.datas.keys()) >= self.params['data.count'] and self.data_controller.is_all_packages_delivered_or_lost():
             self.runner.stop()
 
 
-    def log_agents(self):
+    def get_sampled_agents(self, agent_type, sample_ids):
+        if len(sample_ids) == 0:
+            return list(self.get_local_agents(agent_type))
+
+        if self.is_distributed:
+            sample_ids = set(sample_ids)
+            return [agent for agent in self.get_local_agents(agent_type) if agent.id in sample_ids]
+
+        sampled_agents = []
+        for agent_id in sample_ids:
+            agent = self.context.agent((agent_id, agent_type, self.rank))
+            if agent is not None:
+                sampled_agents.append(agent)
+
+        return sampled_agents
+
+    def log_drones(self):
         tick = self.runner.schedule.tick
-        for drone in self.context.agents(Drone.TYPE):
+        for drone in self.get_sampled_agents(Drone.TYPE, self.params['log.drone.sample_ids']):
             is_start = 0
             is_end = 0
             if drone.id == self.start_drone_id:
@@ -215,32 +713,87 @@ class Model:
                 is_end = 1
             self.drone_logger.log_row(tick, drone.id, drone.pt.x, drone.pt.y, is_start, is_end)
 
-        for scout in self.context.agents(Scout.TYPE):
-            pt = scout.get_location_point(self.context)
+        self.drone_logger.write()
+
+    def log_scouts(self):
+        scouts = self.get_sampled_agents(Scout.TYPE, self.params['log.scout.sample_ids'])
+        if self.scout_engine is not None:
+            self.scout_engine.update_scouts(scouts)
+
+        for scout in scouts:
+            pt = scout.get_location_point(self.get_drones_index())
             self.scout_logger.log_row(self.runner.schedule.tick, scout.id, scout.path[scout.current_drone_index], pt.x, pt.y, int(scout.explore_phase))
 
+        self.scout_logger.write()
+
+    def log_workers(self):
         try:
-            for worker in self.context.agents(Worker.TYPE):
-                pt = worker.get_location_point(self.context)
+            for worker in self.get_sampled_agents(Worker.TYPE, self.params['log.worker.sample_ids']):
+                pt = worker.get_location_point(self.get_drones_index())
                 self.worker_logger.log_row(self.runner.schedule.tick, worker.id, worker.current_drone_id, pt.x, pt.y, int(worker.sending_phase))
         except KeyError:
             pass
-        
-        self.drone_logger.write()
-        self.scout_logger.write()
+
         self.worker_logger.write()
 
+    def is_log_tick(self, period):
+        if period <= 0:
+            return False
+
+        tick = int(self.runner.schedule.tick)
+        return tick == 0 or (tick - 1) % period == 0
+
+    def log_agents(self):
+        if self.is_log_tick(self.params['log.drone.period']):
+            self.log_drones()
+        if self.is_log_tick(self.params['log.scout.period']):
+            self.log_scouts()
+        if self.is_log_tick(self.params['log.worker.period']):
+            self.log_workers()
+
+    def log_profile(self):
+        for phase_stats in self.profiler.pop_tick_phases():
+            self.profile_logger.log_row(self.runner.schedule.tick, self.rank, *phase_stats)
+        self.profile_logger.write()
+
     def at_end(self):
+        self.agent_cache_logger.log_row(self.runner.schedule.tick, self.rank, *agent_cache.get_stats())
+        self.agent_cache_logger.close()
+        if self.is_log_rank:
+            for metric, value in self.metrics.get_summary():
+                self.summary_logger.log_row(metric, value)
+        self.summary_logger.close()
+        if self.profiler is not None:
+            for phase_stats in self.profiler.get_summary():
+                self.profile_summary_logger.log_row(self.rank, *phase_stats)
+            self.profile_logger.close()
+            self.profile_summary_logger.close()
         self.drone_logger.close()
         self.scout_logger.close()
+        self.worker_logger.close()
+        self.data_state_logger.close()
+        self.paths_count_logger.close()
+        self.scouting_logger.close()
+        if self.load_balancer is not None:
+            self.load_logger.close()
+        if self.is_path_health_checked:
+            self.path_health_logger.close()
+        if self.is_path_repaired:
+            self.path_repair_logger.close()
+        if self.is_scouting_continuous:
+            if self.is_log_rank:
+                for scout_id, scout_stats in sorted(self.scout_stats.items()):
+                    self.scout_stats_logger.log_row(scout_id, *scout_stats)
+            self.scout_stats_logger.close()
 
     def start(self):
         self.runner.execute()
 
 
-def run(params: Dict):
-    model = Model(MPI.COMM_WORLD, params)
+def run(params: Dict, comm: MPI.Intracomm = MPI.COMM_WORLD):
+    model = Model(comm, params)
     model.start()
+    return model
 
 
 if __name__ == "__main__":
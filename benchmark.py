@@ -0,0 +1,313 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+from mpi4py import MPI
+from repast4py import parameters
+from repast4py.space import DiscretePoint as dpt
+
+import agent_utils
+from agent_utils import restore_agent
+from data_utils import DataController
+from drone_agent import Drone
+from index_utils import DronesIndex
+from path_utils import PathsController
+from scout_agent import Scout
+from scout_engine import ScoutEngine
+from sweep import redirect_log_files
+from worker_agent import Worker
+
+SCALES = {
+    'quick': {'drones': [100, 400], 'scouts': [100, 300], 'packages': [64, 256]},
+    'full': {'drones': [100, 400, 1600], 'scouts': [100, 300, 1000], 'packages': [64, 512, 4096]},
+}
+SPEED_DISTANCES = [5, 10, 15]
+# drones per unit of area of the default beeadhoc.yaml world, kept for every drone count so that
+# the neighborhood of a drone stays the same and only the O(drones) costs grow
+DRONES_DENSITY = 200 / (100 * 100)
+PATH_LENGTH = 10
+CLUSTER_CALLS = 100
+PACKAGES_DONE_CALLS = 1000
+
+
+def get_world_size(drones_count):
+    return max(1, int(round((drones_count / DRONES_DENSITY) ** 0.5)))
+
+
+def create_drones(drones_count, seed=0):
+    rng = np.random.default_rng(seed)
+    world_size = get_world_size(drones_count)
+    return [Drone(i, 0, dpt(int(x), int(y), 0)) for i, (x, y) in enumerate(rng.integers(0, world_size, (drones_count, 2)))]
+
+
+def create_path_drones(paths_count):
+    # parallel rows of drones 4 apart, further than the drone radius from the next row
+    return [Drone(row * PATH_LENGTH + i, 0, dpt(i * 4, row * 20, 0)) for row in range(paths_count) for i in range(PATH_LENGTH)]
+
+
+def time_calls(setup: Callable, call: Callable, calls: int, repeats: int) -> Dict:
+    times = []
+    for _ in range(repeats):
+        state = setup()
+        start_time = time.perf_counter()
+        call(state)
+        times.append((time.perf_counter() - start_time) / calls)
+
+    return {'calls': calls, 'repeats': repeats, 'min_s': min(times), 'mean_s': sum(times) / len(times)}
+
+
+def bench_cluster_drones(drones_count, repeats):
+    drones = create_drones(drones_count)
+    scout = Scout(0, 0, 0, drones_count - 1, 0)
+    points = [drone.pt for drone in drones[:CLUSTER_CALLS]]
+
+    def call(drones):
+        for pt in points:
+            scout.cluster_drones_by_location(drones, pt, SPEED_DISTANCES)
+
+    return [
+        ('scout.cluster_drones_by_location[list]', time_calls(lambda: drones, call, len(points), repeats)),
+        ('scout.cluster_drones_by_location[index]', time_calls(lambda: DronesIndex(drones, SPEED_DISTANCES[2]), call, len(points), repeats)),
+    ]
+
+
+def bench_explore(drones_count, scouts_count, repeats):
+    drones = create_drones(drones_count)
+    drones_index = DronesIndex(drones, SPEED_DISTANCES[2])
+
+    def setup():
+        return [Scout(i, 0, 0, drones_count - 1, 100) for i in range(scouts_count)]
+
+    def call(scouts):
+        for scout in scouts:
+            scout.explore(drones_index, SPEED_DISTANCES)
+
+    def setup_engine():
+        return ScoutEngine([Scout(i, 0, 0, drones_count - 1, 100) for i in range(scouts_count)], 0, drones_count - 1, 100, drones_count)
+
+    def call_engine(scout_engine):
+        scout_engine.explore(drones_index, SPEED_DISTANCES)
+
+    return [('scout.explore', time_calls(setup, call, scouts_count, repeats)),
+            ('scout_engine.explore', time_calls(setup_engine, call_engine, scouts_count, repeats))]
+
+
+def bench_worker_send(packages_count, repeats):
+    drones_index = DronesIndex(create_path_drones(packages_count), SPEED_DISTANCES[2])
+
+    def setup():
+        paths_controller = PathsController(SPEED_DISTANCES)
+        for row in range(packages_count):
+            paths_controller.try_add_path(list(range(row * PATH_LENGTH, (row + 1) * PATH_LENGTH)), [4.0] * (PATH_LENGTH - 1))
+        workers = [Worker(i, 0, i, i * PATH_LENGTH, 0, i, 0) for i in range(packages_count)]
+        return paths_controller, workers
+
+    def call(state):
+        paths_controller, workers = state
+        for worker in workers:
+            worker.send(drones_index, 0, paths_controller, SPEED_DISTANCES)
+
+    return [('worker.send', time_calls(setup, call, packages_count, repeats))]
+
+
+def bench_try_add_path(drones_count, scouts_count, repeats):
+    # one scouting round finding a path per scout, overlapping paths make the intersection checks run
+    rng = np.random.default_rng(0)
+    starts = rng.integers(0, max(1, drones_count - PATH_LENGTH), scouts_count)
+    paths = [list(range(start, start + PATH_LENGTH)) for start in starts]
+    distances = [4.0] * (PATH_LENGTH - 1)
+
+    def call(paths_controller):
+        for path in paths:
+            paths_controller.try_add_path(path, distances)
+
+    return [('paths_controller.try_add_path', time_calls(lambda: PathsController(SPEED_DISTANCES), call, scouts_count, repeats))]
+
+
+def bench_packages_done(packages_count, repeats):
+    data_controller = DataController()
+    for _ in range(max(1, packages_count // 8)):
+        data_controller.add_data(8)
+    for i, (_, package) in enumerate(data_controller.get_not_sent_packages()):
+        package.package_state = 2 if i % 2 == 0 else 1
+
+    def call(data_controller):
+        for _ in range(PACKAGES_DONE_CALLS):
+            data_controller.is_all_packages_delivered_or_lost()
+
+    return [('data_controller.is_all_packages_delivered_or_lost', time_calls(lambda: data_controller, call, PACKAGES_DONE_CALLS, repeats))]
+
+
+def bench_restore_agent(agents, repeats):
+    agents_data = [agent.save() for agent in agents]
+
+    def setup_cold():
+        agent_utils.agent_cache.clear()
+        return agents_data
+
+    def setup_warm():
+        setup_cold()
+        for agent_data in agents_data:
+            restore_agent(agent_data)
+        return agents_data
+
+    def call(agents_data):
+        for agent_data in agents_data:
+            restore_agent(agent_data)
+
+    results = [
+        ('restore_agent[cold]', time_calls(setup_cold, call, len(agents_data), repeats)),
+        ('restore_agent[warm]', time_calls(setup_warm, call, len(agents_data), repeats)),
+    ]
+    agent_utils.agent_cache.clear()
+    return results
+
+
+def create_scouts_on_path(scouts_count):
+    scouts = [Scout(i, 0, 0, PATH_LENGTH - 1, 100) for i in range(scouts_count)]
+    for scout in scouts:
+        scout.path = list(range(PATH_LENGTH))
+        scout.way_back_distances = [4.0] * (PATH_LENGTH - 1)
+    return scouts
+
+
+def bench_model_tick(parameters_file, drones_count, scouts_count, packages_count, ticks, repeats):
+    # imported here so that the agent benchmarks do not need the model modules
+    from bee_ad_hoc import Model
+
+    world_size = get_world_size(drones_count)
+    overrides = {'drone.count': drones_count, 'scout.count': scouts_count, 'world.width': world_size, 'world.height': world_size,
+                 'data.size': max(1, packages_count // 8), 'data.count': 8}
+
+    times = []
+    for _ in range(repeats):
+        with tempfile.TemporaryDirectory() as run_dir:
+            params = parameters.init_params(parameters_file, json.dumps(overrides))
+            redirect_log_files(params, run_dir)
+            model = Model(MPI.COMM_SELF, params)
+
+            start_time = time.perf_counter()
+            for _ in range(ticks):
+                model.runner.schedule.execute()
+            times.append((time.perf_counter() - start_time) / ticks)
+            model.at_end()
+
+    agent_utils.agent_cache.clear()
+    return [('model.tick', {'calls': ticks, 'repeats': repeats, 'min_s': min(times), 'mean_s': sum(times) / len(times)})]
+
+
+def run_benchmarks(scale: Dict, repeats: int, parameters_file: str, ticks: int, filter_text: str = '') -> List[Dict]:
+    results = []
+
+    def add(group, sizes, bench, *args):
+        if filter_text not in group:
+            return
+
+        for name, timing in bench(*args):
+            results.append(dict(benchmark=name, **sizes, **timing))
+
+    drones_counts, scouts_counts, packages_counts = scale['drones'], scale['scouts'], scale['packages']
+    for drones_count in drones_counts:
+        add('scout.cluster_drones_by_location', {'drones': drones_count}, bench_cluster_drones, drones_count, repeats)
+        add('restore_agent', {'drones': drones_count}, bench_restore_agent, create_drones(drones_count), repeats)
+        for scouts_count in scouts_counts:
+            sizes = {'drones': drones_count, 'scouts': scouts_count}
+            add('scout.explore', sizes, bench_explore, drones_count, scouts_count, repeats)
+            add('paths_controller.try_add_path', sizes, bench_try_add_path, drones_count, scouts_count, repeats)
+
+    for scouts_count in scouts_counts:
+        add('restore_agent', {'scouts': scouts_count}, bench_restore_agent, create_scouts_on_path(scouts_count), repeats)
+
+    for packages_count in packages_counts:
+        sizes = {'packages': packages_count}
+        add('worker.send', sizes, bench_worker_send, packages_count, repeats)
+        add('data_controller.is_all_packages_delivered_or_lost', sizes, bench_packages_done, packages_count, repeats)
+        add('restore_agent', sizes, bench_restore_agent, [Worker(i, 0, 0, 0, 0, i, 0) for i in range(packages_count)], repeats)
+
+    if ticks > 0:
+        for drones_count in drones_counts:
+            for scouts_count in scouts_counts:
+                add('model.tick', {'drones': drones_count, 'scouts': scouts_count, 'packages': packages_counts[0]},
+                    bench_model_tick, parameters_file, drones_count, scouts_count, packages_counts[0], ticks, repeats)
+
+    return results
+
+
+def get_result_key(result: Dict):
+    return (result['benchmark'],) + tuple((size, result[size]) for size in ('drones', 'scouts', 'packages') if size in result)
+
+
+def compare_results(results: List[Dict], baseline_results: List[Dict], tolerance: float) -> List[Dict]:
+    """Compares the best time per call of every benchmark that has a baseline, the slower ones than
+    tolerance times the baseline are returned as regressions.
+    """
+    baseline_by_key = {get_result_key(result): result for result in baseline_results}
+
+    regressions = []
+    for result in results:
+        baseline_result = baseline_by_key.get(get_result_key(result))
+        if baseline_result is None:
+            continue
+
+        ratio = result['min_s'] / baseline_result['min_s'] if baseline_result['min_s'] > 0 else 1.0
+        result['baseline_ratio'] = ratio
+        if ratio > tolerance:
+            regressions.append(result)
+
+    return regressions
+
+
+def get_metadata(scale_name: str, repeats: int, ticks: int) -> Dict:
+    return {
+        'scale': scale_name,
+        'repeats': repeats,
+        'ticks': ticks,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def print_results(results: List[Dict]):
+    for result in results:
+        sizes = ' '.join('{}={}'.format(size, result[size]) for size in ('drones', 'scouts', 'packages') if size in result)
+        ratio = ' x{:.2f}'.format(result['baseline_ratio']) if 'baseline_ratio' in result else ''
+        print('{:<52} {:<36} {:>12.3f} us{}'.format(result['benchmark'], sizes, result['min_s'] * 1e6, ratio))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", choices=sorted(SCALES.keys()), default='quick', help="scaling matrix of drone, scout and package counts")
+    parser.add_argument("--repeats", type=int, default=5, help="timed repeats of every benchmark, the best one is compared")
+    parser.add_argument("--ticks", type=int, default=100, help="timed ticks of every model run, 0 skips the model benchmarks")
+    parser.add_argument("--parameters_file", default="beeadhoc.yaml", help="parameters file (yaml format) of the model benchmarks")
+    parser.add_argument("--filter", default='', help="run only the benchmarks with this text in their name")
+    parser.add_argument("--output", default="output/benchmark.json", help="results file (json format)")
+    parser.add_argument("--baseline", default=None, help="results file of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="slowdown against the baseline reported as a regression")
+    args = parser.parse_args()
+
+    results = run_benchmarks(SCALES[args.scale], args.repeats, args.parameters_file, args.ticks, args.filter)
+
+    regressions = []
+    if args.baseline is not None:
+        with open(args.baseline) as fin:
+            regressions = compare_results(results, json.load(fin)['results'], args.tolerance)
+
+    print_results(results)
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w') as fout:
+        json.dump({'metadata': get_metadata(args.scale, args.repeats, args.ticks), 'results': results}, fout, indent=2)
+
+    if len(regressions) > 0:
+        print('{} benchmarks slower than {} times the baseline'.format(len(regressions), args.tolerance))
+        sys.exit(1)
@@ -0,0 +1,135 @@
+from collections import deque
+import numpy as np
+
+from index_utils import get_neighbor_table, pad_neighbor_table
+
+SAFE_BAND = 0
+CLOSE_BAND = 1
+DANGER_BAND = 2
+BAND_NAMES = ('safe', 'close', 'danger')
+
+
+def get_bands(distances, speed_distances):
+    return np.where(distances <= speed_distances[0], SAFE_BAND,
+                    np.where(distances <= speed_distances[1], CLOSE_BAND, DANGER_BAND)).astype(np.int8)
+
+
+class ConnectivityCache:
+    """Drone connectivity of one drone-move epoch, built once after the drones
+    move and shared by scouts and workers until the next move: a CSR adjacency
+    of the drones within drone_radius_distance labeled with the speed band of
+    every edge, the connected components and the hop distance to the end drone.
+
+    Args:
+        drones: the drones index (DronesIndex or DronePositions) of the epoch
+        speed_distances: stable sending speed, close to disconnect and drone radius distances
+        end_drone_id: id of the drone the scouts search for
+    """
+
+    def __init__(self, drones, speed_distances, end_drone_id) -> None:
+        self.drones = drones
+        self.speed_distances = speed_distances
+        self.end_drone_id = end_drone_id
+
+        self.drone_list = list(drones)
+        self.drone_ids = np.array([drone.id for drone in self.drone_list], dtype=np.int64)
+        self.rows = {drone.id: row for row, drone in enumerate(self.drone_list)}
+        if hasattr(drones, 'xy'):
+            self.xy = drones.xy.copy()
+        else:
+            self.xy = np.array([(drone.pt.x, drone.pt.y) for drone in self.drone_list], dtype=np.int64).reshape(-1, 2)
+
+        self.build_adjacency()
+        self.components = self.get_components()
+        self.hop_distances = self.get_hop_distances()
+
+        self.clusters = {}
+        self.neighbor_rows = None
+
+    def __iter__(self):
+        return iter(self.drone_list)
+
+    def __len__(self):
+        return len(self.drone_list)
+
+    def find(self, drone_id):
+        if drone_id in self.rows:
+            return self.drone_list[self.rows[drone_id]]
+
+    def build_adjacency(self):
+        self.indptr, self.indices, self.distances = get_neighbor_table(self.drone_ids, self.xy, self.speed_distances[2])
+        self.bands = get_bands(self.distances, self.speed_distances)
+
+    def get_neighbors(self, row):
+        return self.indices[self.indptr[row]:self.indptr[row + 1]]
+
+    def get_components(self):
+        components = np.full(len(self.drone_list), -1, dtype=np.int64)
+        component = 0
+        for first_row in range(len(self.drone_list)):
+            if components[first_row] >= 0:
+                continue
+
+            components[first_row] = component
+            rows = [first_row]
+            while len(rows) > 0:
+                neighbors = self.get_neighbors(rows.pop())
+                neighbors = neighbors[components[neighbors] < 0]
+                components[neighbors] = component
+                rows.extend(neighbors.tolist())
+            component += 1
+
+        return components
+
+    def get_hop_distances(self):
+        hop_distances = np.full(len(self.drone_list), -1, dtype=np.int64)
+        if self.end_drone_id not in self.rows:
+            return hop_distances
+
+        end_row = self.rows[self.end_drone_id]
+        hop_distances[end_row] = 0
+        rows = deque([end_row])
+        while len(rows) > 0:
+            row = rows.popleft()
+            neighbors = self.get_neighbors(row)
+            neighbors = neighbors[hop_distances[neighbors] < 0]
+            hop_distances[neighbors] = hop_distances[row] + 1
+            rows.extend(neighbors.tolist())
+
+        return hop_distances
+
+    def get_hop_distance(self, drone_id):
+        if drone_id not in self.rows:
+            return -1
+
+        return int(self.hop_distances[self.rows[drone_id]])
+
+    def is_connected(self, drone_id, other_drone_id):
+        if drone_id not in self.rows or other_drone_id not in self.rows:
+            return False
+
+        return self.components[self.rows[drone_id]] == self.components[self.rows[other_drone_id]]
+
+    def cluster_by_drone(self, drone_id, excluded_ids):
+        row = self.rows[drone_id]
+        if row not in self.clusters:
+            neighbors = slice(self.indptr[row], self.indptr[row + 1])
+            self.clusters[row] = [[self.drone_list[neighbor] for neighbor in self.indices[neighbors][self.bands[neighbors] == band]]
+                                  for band in (SAFE_BAND, CLOSE_BAND, DANGER_BAND)]
+
+        return {band_name: [drone for drone in drones if drone.id not in excluded_ids]
+                for band_name, drones in zip(BAND_NAMES, self.clusters[row])}
+
+    def cluster_by_location(self, current_point, speed_distances, excluded_ids):
+        return self.drones.cluster_by_location(current_point, speed_distances, excluded_ids)
+
+    def get_padded_neighbors(self):
+        """Returns the neighbor rows, bands and distances of every row padded to
+        the largest degree, the padding rows are -1.
+        """
+        if self.neighbor_rows is None:
+            self.neighbor_rows = pad_neighbor_table(self.indptr, self.indices, -1)
+            self.neighbor_bands = pad_neighbor_table(self.indptr, self.bands, -1)
+            self.neighbor_distances = pad_neighbor_table(self.indptr, self.distances, 0)
+
+        return self.neighbor_rows, self.neighbor_bands, self.neighbor_distances
@@ -1,8 +1,21 @@
 class Package:
 
-    def __init__(self, package_id) -> None:
+    def __init__(self, package_id, data_id=None) -> None:
         self.package_id = package_id
-        self.package_state = 0
+        self.data_id = data_id
+        self.on_state_changed = None
+        self._package_state = 0
+
+    @property
+    def package_state(self):
+        return self._package_state
+
+    @package_state.setter
+    def package_state(self, package_state):
+        old_package_state = self._package_state
+        self._package_state = package_state
+        if self.on_state_changed is not None and old_package_state != package_state:
+            self.on_state_changed(self, old_package_state, package_state)
 
 class Data:
 
@@ -12,7 +25,7 @@ class Data:
         
         self.packages = {}
         for i in range(data_size):
-            self.packages[i] = Package(i)
+            self.packages[i] = Package(i, data_id)
 
     def get_not_sent_packages(self):
         not_sent_packages = []
@@ -28,26 +41,43 @@ class DataController:
         self.datas = {}
         self.new_data_id = 0
 
+        self.package_state_counts = {}
+        self.not_sent_packages = {}
+        self.on_package_state_changed = None
+
     def add_data(self, data_size) -> Data:
-        self.datas[self.new_data_id] = Data(self.new_data_id, data_size)
+        data = Data(self.new_data_id, data_size)
+        self.datas[self.new_data_id] = data
         self.new_data_id += 1
-        return self.datas[self.new_data_id - 1]
 
-    def get_not_sent_packages(self):
-        not_sent_packages = []
-        for data in self.datas.values():
-            for package in data.get_not_sent_packages():
-                not_sent_packages.append((data.data_id, package))
+        for package in data.packages.values():
+            package.on_state_changed = self.update_package_state
+            self.package_state_counts[package.package_state] = self.get_packages_count(package.package_state) + 1
+            if package.package_state == 0:
+                self.not_sent_packages[(data.data_id, package.package_id)] = (data.data_id, package)
 
-        return not_sent_packages
+        return data
 
-    def is_all_packages_delivered_or_lost(self):
-        for data in self.datas.values():
-            for package in data.packages.values():
-                if package.package_state == 0 or package.package_state == 1:
-                    return False
+    def update_package_state(self, package, old_package_state, new_package_state):
+        self.package_state_counts[old_package_state] -= 1
+        self.package_state_counts[new_package_state] = self.get_packages_count(new_package_state) + 1
+
+        if old_package_state == 0:
+            del self.not_sent_packages[(package.data_id, package.package_id)]
+        if new_package_state == 0:
+            self.not_sent_packages[(package.data_id, package.package_id)] = (package.data_id, package)
+
+        if self.on_package_state_changed is not None:
+            self.on_package_state_changed(package, old_package_state, new_package_state)
+
+    def get_packages_count(self, package_state):
+        return self.package_state_counts.get(package_state, 0)
 
-        return True
+    def get_not_sent_packages(self):
+        return list(self.not_sent_packages.values())
+
+    def is_all_packages_delivered_or_lost(self):
+        return self.get_packages_count(0) == 0 and self.get_packages_count(1) == 0
 
 
     
\ No newline at end of file
@@ -1,7 +1,32 @@
 def find_agent_by_id(agents, id):
+    if hasattr(agents, 'find'):
+        return agents.find(id)
+
     for agent in agents:
         if id == agent.id:
             return agent
 
 def distance(pt1, pt2):
-    return ((pt1.x - pt2.x) ** 2 + (pt1.y - pt2.y) ** 2) ** 0.5
\ No newline at end of file
+    return ((pt1.x - pt2.x) ** 2 + (pt1.y - pt2.y) ** 2) ** 0.5
+
+def cluster_drones_by_distance(drones, current_point, speed_distances, excluded_ids):
+    clustered_drones = {'safe': [], 'close': [], 'danger': []}
+
+    for drone in drones:
+        if drone.id in excluded_ids:
+            continue
+
+        distance_to_drone = distance(drone.pt, current_point)
+        if distance_to_drone <= speed_distances[0]:
+            clustered_drones['safe'].append(drone)
+            continue
+
+        if distance_to_drone <= speed_distances[1]:
+            clustered_drones['close'].append(drone)
+            continue
+
+        if distance_to_drone <= speed_distances[2]:
+            clustered_drones['danger'].append(drone)
+            continue
+
+    return clustered_drones
\ No newline at end of file
@@ -0,0 +1,84 @@
+from repast4py.space import DiscretePoint as dpt
+
+from drone_agent import Drone
+
+
+def is_in_bounds(bounds, x, y):
+    return bounds.xmin <= x < bounds.xmin + bounds.xextent and bounds.ymin <= y < bounds.ymin + bounds.yextent
+
+
+def get_buffer_agents(grid, agent_type, buffer_size, global_bounds):
+    local_bounds = grid.get_local_bounds()
+    xmin = max(local_bounds.xmin - buffer_size, global_bounds.xmin)
+    xmax = min(local_bounds.xmin + local_bounds.xextent + buffer_size, global_bounds.xmin + global_bounds.xextent)
+    ymin = max(local_bounds.ymin - buffer_size, global_bounds.ymin)
+    ymax = min(local_bounds.ymin + local_bounds.yextent + buffer_size, global_bounds.ymin + global_bounds.yextent)
+
+    agents = []
+    for x in range(xmin, xmax):
+        for y in range(ymin, ymax):
+            if is_in_bounds(local_bounds, x, y):
+                continue
+
+            for agent in grid.get_agents(dpt(x, y, 0)):
+                if agent.uid[1] == agent_type:
+                    agents.append(agent)
+
+    return agents
+
+
+def gather_drones(comm, drones):
+    drone_rows = [(drone.id, drone.uid[2], drone.pt.x, drone.pt.y) for drone in drones]
+    gathered_rows = sorted(row for rank_rows in comm.allgather(drone_rows) for row in rank_rows)
+    return [Drone(drone_id, rank, dpt(x, y, 0)) for drone_id, rank, x, y in gathered_rows]
+
+
+def gather_point(comm, pt):
+    for gathered_pt in comm.allgather(None if pt is None else (pt.x, pt.y)):
+        if gathered_pt is not None:
+            return dpt(gathered_pt[0], gathered_pt[1], 0)
+
+    return None
+
+
+class SharedEvents:
+    """Keeps the data and paths controllers identical on every rank. Package
+    states and connection business are applied on the rank where they change
+    and replayed on the others, while path usability and distances are only
+    applied on exchange, in rank order, so every rank admits the same paths.
+    """
+
+    def __init__(self, comm, data_controller, paths_controller) -> None:
+        self.comm = comm
+        self.rank = comm.Get_rank()
+        self.data_controller = data_controller
+        self.paths_controller = paths_controller
+        self.events = []
+
+    def set_package_state(self, data_id, package_id, package_state):
+        self.data_controller.datas[data_id].packages[package_id].package_state = package_state
+        self.events.append(('package', data_id, package_id, package_state))
+
+    def set_path_unusable(self, path_id):
+        self.events.append(('unusable', path_id))
+
+    def update_path_distances(self, path_id, distances):
+        self.events.append(('distances', path_id, distances))
+
+    def set_connection_business(self, path, connection, is_busy):
+        self.events.append(('business', path.path_id, connection, is_busy))
+
+    def exchange(self):
+        ranks_events = self.comm.allgather(self.events)
+        self.events = []
+
+        for rank, events in enumerate(ranks_events):
+            for event in events:
+                if event[0] == 'package' and rank != self.rank:
+                    self.data_controller.datas[event[1]].packages[event[2]].package_state = event[3]
+                elif event[0] == 'unusable':
+                    self.paths_controller.paths[event[1]].is_can_be_used = False
+                elif event[0] == 'distances':
+                    self.paths_controller.update_path_distances(event[1], event[2])
+                elif event[0] == 'business' and rank != self.rank:
+                    self.paths_controller.paths[event[1]].connection_business[event[2]] = event[3]
@@ -3,9 +3,11 @@ from typing import Dict, Tuple
 from mpi4py import MPI
 import numpy as np
 
-from repast4py import core, random
+from repast4py import core
 from repast4py.space import DiscretePoint as dpt
 
+from rng_utils import RandomStream
+
 class Drone(core.Agent):
 
     TYPE = 0
@@ -13,12 +15,34 @@ class Drone(core.Agent):
 
     def __init__(self, local_id: int, rank: int, pt: dpt):
         super().__init__(id=local_id, type=Drone.TYPE, rank=rank)
+        self.positions = None
+        self.row = -1
         self.pt = pt
+        self.random_stream = RandomStream(Drone.TYPE, local_id)
+
+    @property
+    def pt(self):
+        if self.positions is None:
+            return self.local_pt
+
+        x, y = self.positions.xy[self.row]
+        return dpt(int(x), int(y), 0)
+
+    @pt.setter
+    def pt(self, pt):
+        if self.positions is None:
+            self.local_pt = pt
+        else:
+            self.positions.xy[self.row] = (pt.x, pt.y)
 
+    def attach_positions(self, positions, row):
+        self.positions = positions
+        self.row = row
 
     def save(self) -> Tuple:
-        return (self.uid, self.pt.x, self.pt.y)
+        return (self.uid, self.pt.x, self.pt.y, self.random_stream.counter)
 
     def fly(self, grid):
-        xy_dirs = random.default_rng.choice(Drone.OFFSETS, size=2)
-        self.pt = grid.move(self, dpt(self.pt.x + xy_dirs[0], self.pt.y + xy_dirs[1], 0))
\ No newline at end of file
+        x_dir = Drone.OFFSETS[self.random_stream.randrange(len(Drone.OFFSETS))]
+        y_dir = Drone.OFFSETS[self.random_stream.randrange(len(Drone.OFFSETS))]
+        self.pt = grid.move(self, dpt(self.pt.x + x_dir, self.pt.y + y_dir, 0))
\ No newline at end of file
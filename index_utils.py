@@ -0,0 +1,104 @@
+import numpy as np
+
+from distance_utils import cluster_drones_by_distance
+
+
+class DronesIndex:
+
+    def __init__(self, drones, cell_size) -> None:
+        self.drones = drones
+        self.cell_size = cell_size
+
+        self.drones_by_id = {}
+        self.cells = {}
+        for drone in self.drones:
+            self.drones_by_id[drone.id] = drone
+            self.cells.setdefault(self.get_cell(drone.pt), []).append(drone)
+
+    def __iter__(self):
+        return iter(self.drones)
+
+    def find(self, drone_id):
+        return self.drones_by_id.get(drone_id)
+
+    def get_cell(self, pt):
+        return (int(pt.x // self.cell_size), int(pt.y // self.cell_size))
+
+    def get_neighbors(self, pt):
+        cell_x, cell_y = self.get_cell(pt)
+        neighbors = []
+        for x in range(cell_x - 1, cell_x + 2):
+            for y in range(cell_y - 1, cell_y + 2):
+                if (x, y) in self.cells:
+                    neighbors.extend(self.cells[(x, y)])
+
+        # ordered by id so that the choice of a neighbor does not depend on the order drones arrived on this rank
+        neighbors.sort(key=lambda drone: drone.id)
+        return neighbors
+
+    def cluster_by_location(self, current_point, speed_distances, excluded_ids):
+        return cluster_drones_by_distance(self.get_neighbors(current_point), current_point, speed_distances, excluded_ids)
+
+
+def get_neighbor_table(drone_ids, xy, radius):
+    """Returns the drones within radius of every row as a CSR table (indptr,
+    neighbor rows, distances), the neighbors of a row ordered by id as
+    DronesIndex orders them. Only the drones of the adjacent cells of a grid
+    with radius sized cells are compared, so the cost follows the neighbors
+    and not the square of the drones.
+    """
+    drones_count = len(drone_ids)
+    if drones_count == 0:
+        return np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+
+    cells = np.floor_divide(xy, radius).astype(np.int64)
+    cells -= cells.min(axis=0) - 1
+    # a margin of one cell on every side, so the adjacent cells of every drone are in the grid
+    columns_count, rows_count = cells.max(axis=0) + 2
+    cell_keys = cells[:, 0] * rows_count + cells[:, 1]
+    order = np.argsort(cell_keys, kind='stable')
+    cell_counts = np.bincount(cell_keys, minlength=columns_count * rows_count)
+    cell_starts = np.cumsum(cell_counts) - cell_counts
+
+    sources, targets = [], []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            adjacent_keys = cell_keys + dx * rows_count + dy
+            starts, counts = cell_starts[adjacent_keys], cell_counts[adjacent_keys]
+            cell_sources = np.repeat(np.arange(drones_count), counts)
+            positions = np.arange(len(cell_sources)) - np.repeat(np.cumsum(counts) - counts - starts, counts)
+            sources.append(cell_sources)
+            targets.append(order[positions])
+
+    sources, targets = np.concatenate(sources), np.concatenate(targets)
+    deltas_x = xy[sources, 0] - xy[targets, 0]
+    deltas_y = xy[sources, 1] - xy[targets, 1]
+    squared_distances = deltas_x * deltas_x + deltas_y * deltas_y
+    is_neighbor = (squared_distances <= radius * radius) & (sources != targets)
+    sources, targets = sources[is_neighbor], targets[is_neighbor]
+    distances = np.sqrt(squared_distances[is_neighbor])
+    is_neighbor = distances <= radius
+    sources, targets, distances = sources[is_neighbor], targets[is_neighbor], distances[is_neighbor]
+
+    id_positions = np.empty(drones_count, dtype=np.int64)
+    id_positions[np.argsort(drone_ids, kind='stable')] = np.arange(drones_count)
+    neighbor_order = np.argsort(sources * drones_count + id_positions[targets], kind='stable')
+    indptr = np.zeros(drones_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=drones_count), out=indptr[1:])
+    return indptr, targets[neighbor_order], distances[neighbor_order]
+
+
+def pad_neighbor_table(indptr, values, fill_value):
+    """Returns the CSR values as one row per drone padded to the largest degree
+    with fill_value, with one column at least so that choosing among no
+    neighbors still has an axis to reduce.
+    """
+    drones_count = len(indptr) - 1
+    degrees = np.diff(indptr)
+    max_degree = max(1, int(degrees.max()) if drones_count > 0 else 0)
+    sources = np.repeat(np.arange(drones_count), degrees)
+    columns = np.arange(len(values)) - indptr[sources]
+
+    padded_values = np.full((drones_count, max_degree), fill_value, dtype=values.dtype)
+    padded_values[sources, columns] = values
+    return padded_values
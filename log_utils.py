@@ -0,0 +1,121 @@
+import csv
+import os
+import re
+from typing import List
+from mpi4py import MPI
+import numpy as np
+
+from repast4py.logging import find_free_filename
+
+
+class BufferedLogger:
+    """Logs rows into per-column buffers and flushes them to the output file
+    once the buffers hold flush_rows rows or flush_period ticks have passed
+    since the last flush. Rows are written as CSV or as numbered NPZ chunks
+    with one typed array per column. Unlike TabularLogger, flushing is not a
+    collective operation: with more than one rank each rank writes its own file.
+
+    Args:
+        comm: the mpi communicator the model is distributed over
+        fpath: the file to write the data to
+        headers: the header values for each column
+        log_format: 'csv' or 'npz'
+        flush_rows: the count of buffered rows which triggers a flush
+        flush_period: the count of ticks between flushes
+        get_tick: returns the current tick
+    """
+
+    def __init__(self, comm: MPI.Intracomm, fpath: str, headers: List[str], log_format: str,
+                 flush_rows: int, flush_period: float, get_tick):
+        self.headers = headers
+        self.log_format = log_format
+        self.flush_rows = flush_rows
+        self.flush_period = flush_period
+        self.get_tick = get_tick
+
+        self.columns = [[] for _ in headers]
+        self.rows_count = 0
+        self.last_flush_tick = get_tick()
+        self.chunk_id = 0
+
+        base, extension = os.path.splitext(fpath)
+        if comm.Get_size() > 1:
+            base = '{}.rank{}'.format(base, comm.Get_rank())
+
+        parent = os.path.dirname(base)
+        if parent != '' and not os.path.exists(parent):
+            os.makedirs(parent, exist_ok=True)
+
+        if self.log_format == 'csv':
+            self.fpath = find_free_filename(base + extension)
+            with open(self.fpath, 'w', newline='') as fout:
+                csv.writer(fout).writerow(headers)
+        else:
+            self.fpath = find_free_chunks_base(base)
+
+    def log_row(self, *args):
+        for column, value in zip(self.columns, args):
+            column.append(value)
+        self.rows_count += 1
+
+    def write(self):
+        if self.rows_count >= self.flush_rows or self.get_tick() - self.last_flush_tick >= self.flush_period:
+            self.flush()
+
+    def flush(self):
+        self.last_flush_tick = self.get_tick()
+        if self.rows_count == 0:
+            return
+
+        if self.log_format == 'csv':
+            with open(self.fpath, 'a', newline='') as fout:
+                csv.writer(fout).writerows(zip(*self.columns))
+        else:
+            chunk = {header: np.asarray(column) for header, column in zip(self.headers, self.columns)}
+            np.savez('{}.{:05d}.npz'.format(self.fpath, self.chunk_id), **chunk)
+            self.chunk_id += 1
+
+        for column in self.columns:
+            column.clear()
+        self.rows_count = 0
+
+    def close(self):
+        self.flush()
+
+
+def get_chunk_names(base):
+    """Returns the sorted file names of the NPZ chunks written with the base
+    path, only base.NNNNN.npz, so that other bases starting the same, like
+    the files of the ranks, are left out.
+    """
+    directory = os.path.dirname(base) or '.'
+    if not os.path.isdir(directory):
+        return []
+
+    chunk_pattern = re.compile(re.escape(os.path.basename(base)) + r'\.\d{5}\.npz')
+    return sorted(name for name in os.listdir(directory) if chunk_pattern.fullmatch(name))
+
+
+def find_free_chunks_base(base):
+    """Returns the base path with a numeric infix, as find_free_filename adds
+    it, when chunks of an earlier run were written with it, so that a
+    shorter run does not leave stale chunks after its own.
+    """
+    free_base = base
+    infix = 1
+    while len(get_chunk_names(free_base)) > 0:
+        free_base = '{}_{}'.format(base, infix)
+        infix += 1
+
+    return free_base
+
+
+def read_npz_log(fpath):
+    base, _ = os.path.splitext(fpath)
+    directory = os.path.dirname(base) or '.'
+
+    chunks = [np.load(os.path.join(directory, name)) for name in get_chunk_names(base)]
+    if len(chunks) == 0:
+        return {}
+
+    return {header: np.concatenate([chunk[header] for chunk in chunks]) for header in chunks[0].files}
@@ -0,0 +1,93 @@
+class RunningStats:
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def get_mean(self):
+        if self.count == 0:
+            return None
+
+        return self.total / self.count
+
+
+class MetricsCollector:
+    """Collects the run summary while the model runs. Only the data with
+    packages still in flight is kept, as its creation tick and the count of
+    its unfinished packages.
+
+    Args:
+        get_tick: returns the current tick
+    """
+
+    def __init__(self, get_tick) -> None:
+        self.get_tick = get_tick
+
+        self.delivered_count = 0
+        self.lost_count = 0
+        self.package_lifetimes = RunningStats()
+        self.data_lifetimes = RunningStats()
+        self.found_paths = RunningStats()
+
+        self.datas_in_flight = {}
+
+        # returns the submitted and the duplicate paths counts of the paths controller
+        self.get_paths_submissions = None
+
+    def add_data(self, data):
+        self.datas_in_flight[data.data_id] = [self.get_tick(), len(data.packages)]
+
+    def update_package_state(self, package, old_package_state, new_package_state):
+        if new_package_state == 2:
+            self.delivered_count += 1
+        elif new_package_state == -1:
+            self.lost_count += 1
+        else:
+            return
+
+        tick = self.get_tick()
+        data_in_flight = self.datas_in_flight[package.data_id]
+        self.package_lifetimes.add(tick - data_in_flight[0])
+
+        data_in_flight[1] -= 1
+        if data_in_flight[1] == 0:
+            self.data_lifetimes.add(tick - data_in_flight[0])
+            del self.datas_in_flight[package.data_id]
+
+    def add_scouting_stage(self, paths_count):
+        self.found_paths.add(paths_count)
+
+    def get_summary(self):
+        summary = [
+            ('scouting_stages_count', self.found_paths.count),
+            ('found_paths_mean', self.found_paths.get_mean()),
+            ('delivered_packages_count', self.delivered_count),
+            ('lost_packages_count', self.lost_count),
+            ('package_lifetime_min', self.package_lifetimes.min),
+            ('package_lifetime_max', self.package_lifetimes.max),
+            ('package_lifetime_mean', self.package_lifetimes.get_mean()),
+            ('data_lifetime_min', self.data_lifetimes.min),
+            ('data_lifetime_max', self.data_lifetimes.max),
+            ('data_lifetime_mean', self.data_lifetimes.get_mean()),
+        ]
+        if self.get_paths_submissions is not None:
+            submitted_count, duplicate_count = self.get_paths_submissions()
+            # share of the found paths with drones no usable path had, the diversity of the discovery
+            distinct_share = (submitted_count - duplicate_count) / submitted_count if submitted_count > 0 else None
+            summary.extend([
+                ('submitted_paths_count', submitted_count),
+                ('duplicate_paths_count', duplicate_count),
+                ('distinct_paths_share', distinct_share),
+            ])
+
+        return summary
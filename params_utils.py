@@ -30,10 +30,53 @@ def check_params(params) -> tuple:
     if params['data.generate_period'] <= 0:
         return (False, "data.generate_period cannot be less than one")
 
+    if params['scout.paths_per_tick'] < 0:
+        return (False, "scout.paths_per_tick cannot be less than zero")
+
+    if params['path.repair_scouts'] < 0:
+        return (False, "path.repair_scouts cannot be less than zero")
+
+    if params['path.repair_scouts'] > 0 and not params['path.health_check']:
+        return (False, "path.repair_scouts can be used only with path.health_check")
+
+    if params['path.repair_energy_limit'] <= 0:
+        return (False, "path.repair_energy_limit cannot be less than one")
+
     if params['world.width'] <= 0:
         return (False, "world.width cannot be less than one")
 
     if params['world.height'] <= 0:
         return (False, "world.height cannot be less than one")
 
+    if params['world.distributed'] and params['scout.batched']:
+        return (False, "scout.batched cannot be used with world.distributed")
+
+    if params['load_balance.period'] < 0:
+        return (False, "load_balance.period cannot be less than zero")
+
+    if params['load_balance.period'] > 0 and not params['world.distributed']:
+        return (False, "load_balance.period can be used only with world.distributed")
+
+    if params['load_balance.threshold'] < 1:
+        return (False, "load_balance.threshold cannot be less than one")
+
+    if params['agent_cache.max_size'] < 0:
+        return (False, "agent_cache.max_size cannot be less than zero")
+
+    if params['profile.message_sample_period'] <= 0:
+        return (False, "profile.message_sample_period cannot be less than one")
+
+    if params['log.format'] not in ('csv', 'npz'):
+        return (False, "log.format must be csv or npz")
+
+    if params['log.flush_rows'] <= 0:
+        return (False, "log.flush_rows cannot be less than one")
+
+    if params['log.flush_period'] <= 0:
+        return (False, "log.flush_period cannot be less than one")
+
+    for agent_type in ('drone', 'scout', 'worker'):
+        if params['log.{}.period'.format(agent_type)] < 0:
+            return (False, "log.{}.period cannot be less than zero".format(agent_type))
+
     return (True, "All input parameters are correct")
\ No newline at end of file
@@ -1,3 +1,17 @@
+import numpy as np
+
+
+def get_path_speed(distances, speed_distances):
+    speed = 0
+    for distance in distances:
+        if distance < speed_distances[0]:
+            speed += 1
+        else:
+            speed += 1 / (distance - speed_distances[0] + 1)
+
+    return speed / len(distances)
+
+
 class Path:
 
     def __init__(self, path_id, drones_path, distances, speed_distances) -> None:
@@ -18,16 +32,35 @@ class Path:
         for i in range(len(self.distances)):
             self.connection_business[(self.drones_path[i], self.drones_path[i + 1])] = False
 
-        self.speed = 0
-        for distance in self.distances:
-            if distance < speed_distances[0]:
-                self.speed += 1
-            else:
-                self.speed += 1 / (distance - speed_distances[0] + 1)
-
-        self.speed /= len(distances)
-        self.is_can_be_used = True
         self.speed_distances = speed_distances
+        self.speed = self.get_speed(distances)
+
+        self.on_usability_changed = None
+        self.on_connection_business_changed = None
+        self._is_can_be_used = True
+
+    def get_speed(self, distances):
+        return get_path_speed(distances, self.speed_distances)
+
+    def set_distances(self, distances):
+        self.distances = distances
+        self.speed = self.get_speed(distances)
+
+    @property
+    def is_can_be_used(self):
+        return self._is_can_be_used
+
+    @is_can_be_used.setter
+    def is_can_be_used(self, is_can_be_used):
+        old_is_can_be_used = self._is_can_be_used
+        self._is_can_be_used = is_can_be_used
+        if self.on_usability_changed is not None and old_is_can_be_used != is_can_be_used:
+            self.on_usability_changed(self)
+
+    def set_connection_business(self, connection, is_busy):
+        self.connection_business[connection] = is_busy
+        if self.on_connection_business_changed is not None:
+            self.on_connection_business_changed(self, connection, is_busy)
 
     def is_intersect(self, path):
         for connection in self.connection_business.keys():
@@ -49,47 +82,169 @@ class PathsController:
         self.paths = {}
         self.speed_distances = speed_distances
 
+        self.usable_paths = {}
+        self.connection_paths = {}
+        # usable path id by its drones, the scouts of a round often bring back the same drones
+        self.drones_path_ids = {}
+        self.on_connection_business_changed = None
+
+        self.submitted_paths_count = 0
+        self.duplicate_paths_count = 0
+
+    def add_path(self, path):
+        self.paths[path.path_id] = path
+        path.on_usability_changed = self.update_path_usability
+        path.on_connection_business_changed = self.on_connection_business_changed
+        if path.is_can_be_used:
+            self.add_usable_path(path)
+
+    def update_path_usability(self, path):
+        if path.is_can_be_used:
+            self.add_usable_path(path)
+        else:
+            self.remove_usable_path(path)
+
+    def add_usable_path(self, path):
+        is_in_order = len(self.usable_paths) == 0 or path.path_id > next(reversed(self.usable_paths))
+        self.usable_paths[path.path_id] = path
+        if not is_in_order:
+            self.usable_paths = dict(sorted(self.usable_paths.items()))
+
+        for connection in path.connection_business.keys():
+            self.connection_paths.setdefault(connection, set()).add(path.path_id)
+        self.drones_path_ids[tuple(path.drones_path)] = path.path_id
+
+    def remove_usable_path(self, path):
+        if path.path_id not in self.usable_paths:
+            return
+
+        del self.usable_paths[path.path_id]
+        drones_path = tuple(path.drones_path)
+        if self.drones_path_ids.get(drones_path) == path.path_id:
+            del self.drones_path_ids[drones_path]
+        for connection in path.connection_business.keys():
+            connection_path_ids = self.connection_paths[connection]
+            connection_path_ids.discard(path.path_id)
+            if len(connection_path_ids) == 0:
+                del self.connection_paths[connection]
+
+    def get_intersect_paths(self, path):
+        intersect_path_ids = set()
+        for connection in path.connection_business.keys():
+            if connection in self.connection_paths:
+                intersect_path_ids.update(self.connection_paths[connection])
+
+        return [self.paths[path_id] for path_id in sorted(intersect_path_ids)]
+
     def try_add_path(self, node_ids, distances):
+        self.submitted_paths_count += 1
+        duplicate_path_id = self.drones_path_ids.get(tuple(node_ids))
+        if duplicate_path_id is not None:
+            self.duplicate_paths_count += 1
+            # a duplicate intersects only the usable path it repeats, when not slower its distances are merged in
+            duplicate_path = self.usable_paths[duplicate_path_id]
+            if get_path_speed(distances, self.speed_distances) < duplicate_path.speed:
+                return False
+            if any(distance >= self.speed_distances[1] for distance in distances):
+                return False
+
+            duplicate_path.set_distances(distances)
+            return True
+
         new_path = Path(self.new_path_id, node_ids, distances, self.speed_distances)
+        if not self.try_put_path(new_path):
+            return False
+
+        self.new_path_id += 1
+        return True
+
+    def try_put_path(self, new_path):
         if new_path.is_path_close_to_disconnect():
             return False
 
-        can_be_used_paths = self.get_paths_can_be_used()
-        intersect_paths = []
-        for path in can_be_used_paths:
-            if path.is_intersect(new_path):
-                intersect_paths.append(path)
+        intersect_paths = self.get_intersect_paths(new_path)
         
         if len(intersect_paths) == 0:
-            self.paths[self.new_path_id] = new_path
-            self.new_path_id += 1
+            self.add_path(new_path)
             return True
         elif len(intersect_paths) == 1:
             if new_path.speed < intersect_paths[0].speed:
                 return False
             
             intersect_paths[0].is_can_be_used = False
-            self.paths[self.new_path_id] = new_path
-            self.new_path_id += 1
+            self.add_path(new_path)
             return True
         else:
             return False
 
+    def try_repair_path(self, path_id, node_ids, distances):
+        # the repaired path keeps the id of the broken one and is accepted as a new path would be
+        old_path = self.paths[path_id]
+        if old_path.is_can_be_used:
+            return False
+
+        if not self.try_put_path(Path(path_id, node_ids, distances, self.speed_distances)):
+            return False
+
+        old_path.on_usability_changed = None
+        return True
+
     def update_path_distances(self, path_id, distances):
         updated_path = Path(path_id, self.paths[path_id].drones_path, distances, self.speed_distances)
         if updated_path.is_path_close_to_disconnect():
             updated_path.is_can_be_used = False
 
-        self.paths[path_id] = updated_path
+        old_path = self.paths[path_id]
+        old_path.on_usability_changed = None
+        self.remove_usable_path(old_path)
+        self.add_path(updated_path)
 
-    def get_paths_can_be_used(self):
-        can_be_used_paths = []
-        for path in self.paths.values():
-            if path.is_can_be_used:
-                can_be_used_paths.append(path)
+    def update_paths_health(self, drones):
+        """Recomputes every hop distance of the usable paths from the drone positions
+        in one batched pass, updates the paths in place and marks the ones close to
+        disconnect unusable. Paths with a drone missing from drones are left as they are.
 
-        return can_be_used_paths
+        Returns (evaluated paths, broken paths, paths with missing drones).
+        """
+        paths = self.get_paths_can_be_used()
+        if len(paths) == 0:
+            return (0, 0, 0)
 
+        drones = list(drones)
+        if len(drones) == 0:
+            return (0, 0, len(paths))
 
+        hops_counts = np.array([len(path.drones_path) - 1 for path in paths], dtype=np.int64)
+        sources = np.concatenate([path.drones_path[:-1] for path in paths]).astype(np.int64)
+        targets = np.concatenate([path.drones_path[1:] for path in paths]).astype(np.int64)
 
-        
+        drone_ids = np.array([drone.id for drone in drones], dtype=np.int64)
+        row_by_id = np.full(max(drone_ids.max(initial=-1), sources.max(), targets.max()) + 1, -1, dtype=np.int64)
+        row_by_id[drone_ids] = np.arange(len(drones))
+        xy = np.array([(drone.pt.x, drone.pt.y) for drone in drones], dtype=np.float64).reshape(-1, 2)
+
+        source_rows, target_rows = row_by_id[sources], row_by_id[targets]
+        distances = np.sqrt(((xy[source_rows] - xy[target_rows]) ** 2).sum(axis=1))
+
+        path_indexes = np.repeat(np.arange(len(paths)), hops_counts)
+        is_missing = np.bincount(path_indexes, weights=(source_rows < 0) | (target_rows < 0), minlength=len(paths)) > 0
+        is_broken = np.bincount(path_indexes, weights=distances >= self.speed_distances[1], minlength=len(paths)) > 0
+        is_broken &= ~is_missing
+
+        for path, path_distances, is_path_missing, is_path_broken in zip(paths, np.split(distances, np.cumsum(hops_counts)[:-1]),
+                                                                       is_missing, is_broken):
+            if is_path_missing:
+                continue
+
+            path.set_distances(path_distances.tolist())
+            if is_path_broken:
+                path.is_can_be_used = False
+
+        return (int((~is_missing).sum()), int(is_broken.sum()), int(is_missing.sum()))
+
+    def get_paths_can_be_used(self):
+        return list(self.usable_paths.values())
+
+
+
+        
\ No newline at end of file
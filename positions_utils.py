@@ -0,0 +1,58 @@
+import numpy as np
+
+import rng_utils
+from drone_agent import Drone
+
+
+class DronePositions:
+
+    def __init__(self, drones, bounds) -> None:
+        self.drones = drones
+        self.xy = np.array([(drone.pt.x, drone.pt.y) for drone in drones], dtype=np.int64).reshape(-1, 2)
+        self.mins = np.array([bounds.xmin, bounds.ymin], dtype=np.int64)
+        self.maxs = self.mins + np.array([bounds.xextent - 1, bounds.yextent - 1], dtype=np.int64)
+
+        self.random_keys = rng_utils.get_stream_keys(Drone.TYPE, [drone.id for drone in drones])
+        self.random_counters = np.array([drone.random_stream.counter for drone in drones], dtype=np.int64)
+        self.moves_count = 0
+
+        self.rows = {}
+        for row, drone in enumerate(self.drones):
+            self.rows[drone.id] = row
+            drone.attach_positions(self, row)
+
+    def __iter__(self):
+        return iter(self.drones)
+
+    def find(self, drone_id):
+        if drone_id in self.rows:
+            return self.drones[self.rows[drone_id]]
+
+    def fly(self, offsets):
+        """Moves every drone one step and returns the rows of the drones that moved."""
+        random_values = rng_utils.uniforms(self.random_keys[:, None], self.random_counters[:, None] + np.arange(2))
+        self.random_counters += 2
+        self.moves_count += 1
+        old_xy = self.xy.copy()
+        self.xy += offsets[(random_values * len(offsets)).astype(np.int64)]
+        np.clip(self.xy, self.mins, self.maxs, out=self.xy)
+
+        return np.flatnonzero((self.xy != old_xy).any(axis=1))
+
+    def distances_from(self, current_point):
+        deltas = self.xy - (current_point.x, current_point.y)
+        return np.sqrt((deltas ** 2).sum(axis=1))
+
+    def cluster_by_location(self, current_point, speed_distances, excluded_ids):
+        distances = self.distances_from(current_point)
+
+        can_be_chosen = np.ones(len(self.drones), dtype=bool)
+        can_be_chosen[[self.rows[drone_id] for drone_id in excluded_ids if drone_id in self.rows]] = False
+
+        is_safe = can_be_chosen & (distances <= speed_distances[0])
+        is_close = can_be_chosen & (distances > speed_distances[0]) & (distances <= speed_distances[1])
+        is_danger = can_be_chosen & (distances > speed_distances[1]) & (distances <= speed_distances[2])
+
+        return {'safe': [self.drones[row] for row in np.flatnonzero(is_safe)],
+                'close': [self.drones[row] for row in np.flatnonzero(is_close)],
+                'danger': [self.drones[row] for row in np.flatnonzero(is_danger)]}
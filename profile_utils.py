@@ -0,0 +1,103 @@
+import pickle
+import time
+
+# the pickle based collectives of mpi4py, the buffer based ones start with a capital letter
+PICKLED_COLLECTIVES = ('alltoall', 'allgather', 'allreduce', 'gather', 'bcast', 'scatter', 'reduce')
+
+
+class MessageCounter:
+    """Forwards to an mpi communicator and reports the pickled size of the
+    objects this rank passes to a pickle based collective. Pickling a message
+    again costs about as much as sending it, so only every sample_period-th
+    message of a collective is measured and the messages between two samples
+    are charged with the size of the last sample.
+    """
+
+    def __init__(self, comm, on_message, sample_period=1) -> None:
+        self._comm = comm
+        self._on_message = on_message
+        self._sample_period = sample_period
+        # collective -> [messages count, bytes of the last sampled message]
+        self._samples = {}
+
+    def count(self, name, sendobj):
+        if name not in self._samples:
+            self._samples[name] = [0, 0]
+        sample = self._samples[name]
+        if sample[0] % self._sample_period == 0:
+            sample[1] = len(pickle.dumps(sendobj, protocol=pickle.HIGHEST_PROTOCOL))
+        sample[0] += 1
+        self._on_message(sample[1])
+
+    def wrap_sender(self, name, fill_send_data):
+        """Wraps a function that returns the data sent over a communicator
+        this counter cannot replace, like the cartesian one of repast4py's grid.
+        """
+        def counted():
+            send_data = fill_send_data()
+            self.count(name, send_data)
+            return send_data
+
+        return counted
+
+    def __getattr__(self, name):
+        attr = getattr(self._comm, name)
+        if name not in PICKLED_COLLECTIVES:
+            return attr
+
+        def collective(sendobj, *args, **kwargs):
+            self.count(name, sendobj)
+            return attr(sendobj, *args, **kwargs)
+
+        return collective
+
+
+class PhaseProfiler:
+    """Records the wall time, calls and sent bytes of the model phases. The
+    time of a phase excludes the time of the phases it calls, so the phases of
+    a tick add up to the tick time, and the bytes go to the running phase.
+    """
+
+    def __init__(self) -> None:
+        self.tick_phases = {}
+        self.total_phases = {}
+        # [phase, time of the phases it called] of the running phases, innermost last
+        self.running_phases = []
+
+    def add(self, phase, elapsed_time, calls=1, sent_bytes=0):
+        for phases in (self.tick_phases, self.total_phases):
+            if phase not in phases:
+                phases[phase] = [0.0, 0, 0]
+            phase_stats = phases[phase]
+            phase_stats[0] += elapsed_time
+            phase_stats[1] += calls
+            phase_stats[2] += sent_bytes
+
+    def add_bytes(self, sent_bytes):
+        phase = self.running_phases[-1][0] if len(self.running_phases) > 0 else 'other'
+        self.add(phase, 0.0, 0, sent_bytes)
+
+    def wrap(self, phase, func):
+        def profiled(*args, **kwargs):
+            start_time = time.perf_counter()
+            self.running_phases.append([phase, 0.0])
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed_time = time.perf_counter() - start_time
+                children_time = self.running_phases.pop()[1]
+                if len(self.running_phases) > 0:
+                    self.running_phases[-1][1] += elapsed_time
+                self.add(phase, elapsed_time - children_time)
+
+        return profiled
+
+    def pop_tick_phases(self):
+        tick_phases = sorted((phase, *stats) for phase, stats in self.tick_phases.items())
+        self.tick_phases = {}
+        return tick_phases
+
+    def get_summary(self):
+        total_time = sum(stats[0] for stats in self.total_phases.values())
+        return [(phase, stats[0], stats[1], stats[2], stats[0] / total_time if total_time > 0 else 0.0)
+                for phase, stats in sorted(self.total_phases.items())]
@@ -0,0 +1,99 @@
+from scout_agent import Scout, ExplorePhase
+from rng_utils import RandomStream
+
+# random stream of the repair scouts, after the agent types used by drones, scouts and workers
+REPAIR_STREAM_ID = 3
+
+
+class PathRepair:
+    """Repairs a broken path hop by hop. Every broken hop gets its own scouts,
+    dispatched between the two drones of the hop, and the first usable detour
+    they bring back replaces that hop alone. The drones of the path and of the
+    detours already spliced in are visited from the start, so the repaired path
+    does not cross itself.
+
+    Args:
+        path: the broken path, with the distances of the current drone positions
+        first_scout_id: id of the random stream of the first repair scout
+        scouts_count: repair scouts dispatched for every broken hop
+        energy_limit: energy of every repair scout
+        speed_distances: stable sending speed, close to disconnect and drone radius distances
+    """
+
+    def __init__(self, path, first_scout_id, scouts_count, energy_limit, speed_distances) -> None:
+        self.path = path
+        self.speed_distances = speed_distances
+        self.drones_path = list(path.drones_path)
+        self.distances = list(path.distances)
+
+        broken_indexes = [i for i, distance in enumerate(path.distances) if distance >= speed_distances[1]]
+        # [start drone id, end drone id, scouts] of the broken hops not repaired yet
+        self.broken_hops = []
+        for hop, i in enumerate(broken_indexes):
+            scouts = []
+            for scout_id in range(first_scout_id + hop * scouts_count, first_scout_id + (hop + 1) * scouts_count):
+                scout = Scout(scout_id, 0, path.drones_path[i], path.drones_path[i + 1], energy_limit)
+                scout.random_stream = RandomStream(REPAIR_STREAM_ID, scout_id)
+                scouts.append(scout)
+            self.broken_hops.append([path.drones_path[i], path.drones_path[i + 1], scouts])
+        self.scouts_count = scouts_count * len(self.broken_hops)
+        self.visit_path_drones()
+
+        self.steps_count = 0
+        self.detour_hops = 0
+
+    def visit_path_drones(self):
+        for _, end_drone_id, scouts in self.broken_hops:
+            for scout in scouts:
+                scout.visited_drone_ids.update(drone_id for drone_id in self.drones_path if drone_id != end_drone_id)
+
+    def explore(self, drones):
+        for _, _, scouts in self.broken_hops:
+            for scout in scouts:
+                if scout.explore_phase == ExplorePhase.SEARCHING_END_DRONE or scout.explore_phase == ExplorePhase.GOING_BACK_TO_START:
+                    scout.explore(drones, self.speed_distances)
+                    self.steps_count += 1
+
+        for broken_hop in list(self.broken_hops):
+            if self.try_splice_detour(*broken_hop):
+                self.broken_hops.remove(broken_hop)
+                self.visit_path_drones()
+
+    def try_splice_detour(self, start_drone_id, end_drone_id, scouts):
+        """Replaces the hop between start_drone_id and end_drone_id with the first
+        usable detour of its scouts, returns whether one was spliced in.
+        """
+        path_drone_ids = set(self.drones_path)
+        for scout in scouts:
+            if scout.explore_phase != ExplorePhase.SCOUTING_ENDED:
+                continue
+            if any(distance >= self.speed_distances[1] for distance in scout.way_back_distances):
+                continue
+            # a detour of another hop spliced in meanwhile may use the same drones
+            if not path_drone_ids.isdisjoint(scout.path[1:-1]):
+                continue
+
+            i = self.drones_path.index(start_drone_id)
+            self.drones_path[i:i + 2] = scout.path
+            self.distances[i:i + 1] = scout.way_back_distances
+            self.detour_hops += len(scout.way_back_distances)
+            return True
+
+        return False
+
+    def get_repaired_path(self):
+        """Returns the drones path and distances of the path with a detour spliced
+        in for every broken hop, None while a broken hop has none.
+        """
+        if len(self.broken_hops) > 0:
+            return None
+
+        return (self.drones_path, self.distances)
+
+    def is_ended(self):
+        """Returns whether the repair cannot go on, either every broken hop got
+        a detour or the scouts of a broken hop all ended without a usable one.
+        """
+        return len(self.broken_hops) == 0 or any(all(scout.explore_phase == ExplorePhase.SCOUTING_ENDED or scout.explore_phase == ExplorePhase.STUCK
+                                                     for scout in scouts)
+                                                 for _, _, scouts in self.broken_hops)
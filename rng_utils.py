@@ -0,0 +1,63 @@
+import numpy as np
+
+MASK = (1 << 64) - 1
+GOLDEN_GAMMA = 0x9e3779b97f4a7c15
+
+seed = 0
+
+
+def init(rng_seed: int):
+    global seed
+    seed = rng_seed
+
+
+def mix(x):
+    x = ((x ^ (x >> 30)) * 0xbf58476d1ce4e5b9) & MASK
+    x = ((x ^ (x >> 27)) * 0x94d049bb133111eb) & MASK
+    return x ^ (x >> 31)
+
+
+def mix_array(x):
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xbf58476d1ce4e5b9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94d049bb133111eb)
+    return x ^ (x >> np.uint64(31))
+
+
+def get_stream_key(stream_id, agent_id):
+    key = mix((mix(seed & MASK) + (stream_id + 1) * GOLDEN_GAMMA) & MASK)
+    return mix((key + (agent_id + 1) * GOLDEN_GAMMA) & MASK)
+
+
+def get_stream_keys(stream_id, agent_ids):
+    key = mix((mix(seed & MASK) + (stream_id + 1) * GOLDEN_GAMMA) & MASK)
+    agent_ids = np.asarray(agent_ids, dtype=np.int64).astype(np.uint64)
+    return mix_array(np.uint64(key) + (agent_ids + np.uint64(1)) * np.uint64(GOLDEN_GAMMA))
+
+
+def uniform(key, counter):
+    return (mix((key + (counter + 1) * GOLDEN_GAMMA) & MASK) >> 11) * 2.0 ** -53
+
+
+def uniforms(keys, counters):
+    counters = np.asarray(counters, dtype=np.int64).astype(np.uint64)
+    values = mix_array(keys + (counters + np.uint64(1)) * np.uint64(GOLDEN_GAMMA)) >> np.uint64(11)
+    return values.astype(np.float64) * 2.0 ** -53
+
+
+class RandomStream:
+    """A counter-based stream of uniform numbers: the n-th draw depends only on
+    the seed, the stream and agent ids and n, so an agent draws the same
+    numbers whatever rank it runs on and the counter is all there is to migrate.
+    """
+
+    def __init__(self, stream_id, agent_id, counter=0) -> None:
+        self.key = get_stream_key(stream_id, agent_id)
+        self.counter = counter
+
+    def random(self):
+        value = uniform(self.key, self.counter)
+        self.counter += 1
+        return value
+
+    def randrange(self, n):
+        return int(self.random() * n)
@@ -0,0 +1,41 @@
+import heapq
+
+
+class WorkerScheduler:
+
+    def __init__(self) -> None:
+        self.queue = []
+        self.retry_queue = []
+        self.new_order = 0
+
+    def __len__(self):
+        return len(self.queue) + len(self.retry_queue)
+
+    def add(self, worker):
+        heapq.heappush(self.queue, (worker.next_tick_to_move, self.new_order, worker))
+        self.new_order += 1
+
+    def retry(self, worker):
+        self.retry_queue.append(worker)
+
+    def pop_due_workers(self, tick):
+        due_workers = self.retry_queue
+        self.retry_queue = []
+
+        while len(self.queue) > 0 and self.queue[0][0] <= tick:
+            due_workers.append(heapq.heappop(self.queue)[2])
+
+        return due_workers
+
+    def reschedule(self, workers):
+        workers_by_uid = {worker.uid: worker for worker in workers}
+
+        self.queue = [item for item in self.queue if workers_by_uid.get(item[2].uid) is item[2]]
+        heapq.heapify(self.queue)
+        self.retry_queue = [worker for worker in self.retry_queue if workers_by_uid.get(worker.uid) is worker]
+
+        queued_uids = {item[2].uid for item in self.queue}
+        queued_uids.update(worker.uid for worker in self.retry_queue)
+        for worker in workers_by_uid.values():
+            if worker.uid not in queued_uids:
+                self.add(worker)
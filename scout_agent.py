@@ -1,9 +1,10 @@
-from random import choice
 from typing import Tuple
 from repast4py import core
 from enum import Enum
-from distance_utils import find_agent_by_id, distance
+from distance_utils import find_agent_by_id, distance, cluster_drones_by_distance
 from drone_agent import Drone
+from serialization_utils import pack_scout
+from rng_utils import RandomStream
 
 
 class ExplorePhase(Enum):
@@ -31,6 +32,18 @@ class Scout(core.Agent):
 
         self.explore_phase = ExplorePhase.SEARCHING_END_DRONE
         self.energy_limit = energy_limit
+        self.random_stream = RandomStream(Scout.TYPE, local_id)
+        # the data this scout was restored from, None once this rank owns it and may change it
+        self.restored_data = None
+
+    @property
+    def path(self):
+        return self._path
+
+    @path.setter
+    def path(self, path):
+        self._path = path
+        self.visited_drone_ids = set(path)
 
     def reset(self, energy_limit):
         self.path = [self.start_drone_id]
@@ -41,35 +54,42 @@ class Scout(core.Agent):
 
 
     def save(self) -> Tuple:
-        return (self.uid, self.start_drone_id, self.end_drone_id, self.path, self.way_back_distances,
-                self.current_drone_index, self.explore_phase, self.energy_limit)
+        self.restored_data = None
+        return (self.uid, pack_scout(self))
 
     def cluster_drones_by_location(self, drones, current_point, speed_distances):
-        clustered_drones = {'safe': [], 'close': [], 'danger': []}
-
-        for drone in drones:
-            if drone.id in self.path:
-                continue
-
-            distance_to_drone = distance(drone.pt, current_point)
-            if distance_to_drone <= speed_distances[0]:
-                clustered_drones['safe'].append(drone)
-                continue
-
-            if distance_to_drone <= speed_distances[1]:
-                clustered_drones['close'].append(drone)
-                continue
-            
-            if distance_to_drone <= speed_distances[2]:
-                clustered_drones['danger'].append(drone)
-                continue
-            
-        return clustered_drones
+        if isinstance(drones, list):
+            return cluster_drones_by_distance(drones, current_point, speed_distances, self.visited_drone_ids)
+
+        return drones.cluster_by_location(current_point, speed_distances, self.visited_drone_ids)
+
+    def cluster_next_drones(self, drones, current_drone, speed_distances):
+        if hasattr(drones, 'cluster_by_drone'):
+            return drones.cluster_by_drone(current_drone.id, self.visited_drone_ids)
+
+        return self.cluster_drones_by_location(drones, current_drone.pt, speed_distances)
+
+    def is_end_drone_out_of_reach(self, drones, drone_id):
+        # the hop distances are to the end drone of the connectivity cache only
+        if not hasattr(drones, 'get_hop_distance') or drones.end_drone_id != self.end_drone_id:
+            return False
+
+        # every move costs at least one energy, so the end drone needs more energy than hops to it
+        hop_distance = drones.get_hop_distance(drone_id)
+        return hop_distance < 0 or hop_distance >= self.energy_limit
 
     def move_forward(self, drones, speed_distances):
         current_drone = find_agent_by_id(drones, self.path[self.current_drone_index])
+        if current_drone is None:
+            self.explore_phase = ExplorePhase.STUCK
+            return False
+
+        if self.is_end_drone_out_of_reach(drones, current_drone.id):
+            self.explore_phase = ExplorePhase.STUCK
+            return False
+
         drones_to_choose = []
-        clustered_drones = self.cluster_drones_by_location(drones, current_drone.pt, speed_distances)
+        clustered_drones = self.cluster_next_drones(drones, current_drone, speed_distances)
         if len(clustered_drones['danger']) > 0:
             drones_to_choose = clustered_drones['danger']
         if len(clustered_drones['close']) > 0:
@@ -80,7 +100,7 @@ class Scout(core.Agent):
             self.explore_phase = ExplorePhase.STUCK
             return False
 
-        next_drone = choice(drones_to_choose)
+        next_drone = drones_to_choose[self.random_stream.randrange(len(drones_to_choose))]
         distance_to_drone = distance(current_drone.pt, next_drone.pt)
         if distance_to_drone < speed_distances[0]:
             self.energy_limit -= 1
@@ -91,6 +111,7 @@ class Scout(core.Agent):
             return False
         
         self.path.append(next_drone.id)
+        self.visited_drone_ids.add(next_drone.id)
         self.current_drone_index += 1
 
         if next_drone.id == self.end_drone_id:
@@ -101,14 +122,19 @@ class Scout(core.Agent):
     def move_back(self, drones, speed_distances):
         current_drone = find_agent_by_id(drones, self.path[self.current_drone_index])
         next_drone = find_agent_by_id(drones, self.path[self.current_drone_index - 1])
+        if current_drone is None or next_drone is None:
+            self.explore_phase = ExplorePhase.STUCK
+            return False
+
         distance_to_next_drone = distance(current_drone.pt, next_drone.pt)
 
         if distance_to_next_drone > speed_distances[2]:
             self.explore_phase = ExplorePhase.STUCK
             return False
 
-        self.way_back_distances.insert(0, distance_to_next_drone)
+        self.way_back_distances.append(distance_to_next_drone)
         if next_drone.id == self.start_drone_id:
+            self.way_back_distances.reverse()
             self.explore_phase = ExplorePhase.SCOUTING_ENDED
             return False
 
@@ -123,6 +149,6 @@ class Scout(core.Agent):
         else:
             return False
         
-    def get_location_point(self, context):
-        current_drone = find_agent_by_id(context.agents(Drone.TYPE), self.path[self.current_drone_index])
+    def get_location_point(self, drones):
+        current_drone = find_agent_by_id(drones, self.path[self.current_drone_index])
         return current_drone.pt
\ No newline at end of file
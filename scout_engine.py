@@ -0,0 +1,209 @@
+from math import ceil
+import numpy as np
+
+import rng_utils
+from scout_agent import Scout, ExplorePhase
+from positions_utils import DronePositions
+from connectivity_utils import ConnectivityCache, SAFE_BAND, CLOSE_BAND, DANGER_BAND, get_bands
+from index_utils import get_neighbor_table, pad_neighbor_table
+
+
+class ScoutEngine:
+
+    def __init__(self, scouts, start_drone_id, end_drone_id, energy_limit, drone_ids_count) -> None:
+        self.scouts = scouts
+        self.scout_indexes = {scout.id: scout_index for scout_index, scout in enumerate(scouts)}
+        self.start_drone_id = start_drone_id
+        self.end_drone_id = end_drone_id
+
+        scouts_count = len(self.scouts)
+        self.path_size = ceil(energy_limit) + 1
+        self.paths = np.full((scouts_count, self.path_size), -1, dtype=np.int64)
+        self.path_lengths = np.zeros(scouts_count, dtype=np.int64)
+        self.way_back_distances = np.zeros((scouts_count, self.path_size - 1))
+        self.current_drone_indexes = np.zeros(scouts_count, dtype=np.int64)
+        self.explore_phases = np.zeros(scouts_count, dtype=np.int8)
+        self.energy_limits = np.zeros(scouts_count)
+        self.random_keys = rng_utils.get_stream_keys(Scout.TYPE, [scout.id for scout in scouts])
+        self.random_counters = np.array([scout.random_stream.counter for scout in scouts], dtype=np.int64)
+
+        self.drones_index = None
+        self.drones_moves_count = 0
+        self.drone_ids = np.zeros(0, dtype=np.int64)
+        self.row_by_id = np.full(drone_ids_count, -1, dtype=np.int64)
+        self.xy = np.zeros((0, 2), dtype=np.int64)
+        self.neighbor_rows = np.full((0, 1), -1, dtype=np.int64)
+        self.neighbor_bands = np.full((0, 1), -1, dtype=np.int8)
+        self.neighbor_distances = np.zeros((0, 1))
+
+        self.reset(energy_limit)
+
+    def reset(self, energy_limit, scout_ids=None):
+        scout_indexes = slice(None) if scout_ids is None else [self.scout_indexes[scout_id] for scout_id in scout_ids]
+        self.paths[scout_indexes] = -1
+        self.paths[scout_indexes, 0] = self.start_drone_id
+        self.path_lengths[scout_indexes] = 1
+        self.way_back_distances[scout_indexes] = 0
+        self.current_drone_indexes[scout_indexes] = 0
+        self.explore_phases[scout_indexes] = ExplorePhase.SEARCHING_END_DRONE.value
+        self.energy_limits[scout_indexes] = energy_limit
+
+    def set_drones(self, drones_index, speed_distances):
+        # the position table is the same object every tick, its moves tell the drone-move epochs apart
+        moves_count = drones_index.moves_count if isinstance(drones_index, DronePositions) else 0
+        if drones_index is self.drones_index and moves_count == self.drones_moves_count:
+            return
+
+        self.drones_index = drones_index
+        self.drones_moves_count = moves_count
+        self.drone_ids = np.array([drone.id for drone in drones_index], dtype=np.int64)
+        if isinstance(drones_index, (DronePositions, ConnectivityCache)):
+            self.xy = drones_index.xy
+        else:
+            self.xy = np.array([(drone.pt.x, drone.pt.y) for drone in drones_index], dtype=np.int64).reshape(-1, 2)
+
+        self.row_by_id.fill(-1)
+        self.row_by_id[self.drone_ids] = np.arange(len(self.drone_ids))
+
+        # the neighbors of every drone are found once per drone move and shared by all the scouts
+        if isinstance(drones_index, ConnectivityCache):
+            self.neighbor_rows, self.neighbor_bands, self.neighbor_distances = drones_index.get_padded_neighbors()
+        else:
+            indptr, indices, distances = get_neighbor_table(self.drone_ids, self.xy, speed_distances[2])
+            self.neighbor_rows = pad_neighbor_table(indptr, indices, -1)
+            self.neighbor_bands = pad_neighbor_table(indptr, get_bands(distances, speed_distances), -1)
+            self.neighbor_distances = pad_neighbor_table(indptr, distances, 0)
+
+    def explore(self, drones_index, speed_distances):
+        self.set_drones(drones_index, speed_distances)
+
+        searching_scouts = np.flatnonzero(self.explore_phases == ExplorePhase.SEARCHING_END_DRONE.value)
+        going_back_scouts = np.flatnonzero(self.explore_phases == ExplorePhase.GOING_BACK_TO_START.value)
+
+        self.move_forward(searching_scouts, speed_distances)
+        self.move_back(going_back_scouts, speed_distances)
+
+    def is_end_drone_out_of_reach(self, scouts, current_rows):
+        is_out_of_reach = current_rows < 0
+        # the hop distances are to the end drone of the connectivity cache only
+        if isinstance(self.drones_index, ConnectivityCache) and self.drones_index.end_drone_id == self.end_drone_id:
+            hop_distances = np.where(current_rows >= 0, self.drones_index.hop_distances[current_rows], -1)
+            is_out_of_reach |= (hop_distances < 0) | (hop_distances >= self.energy_limits[scouts])
+
+        return is_out_of_reach
+
+    def is_visited(self, scouts, neighbor_ids):
+        # a scout visited exactly the drones of its path, the path slots after its length are -1
+        paths = self.paths[scouts, :self.path_lengths[scouts].max(initial=1)]
+        return (neighbor_ids[:, :, None] == paths[:, None, :]).any(axis=2)
+
+    def move_forward(self, scouts, speed_distances):
+        current_drone_ids = self.paths[scouts, self.current_drone_indexes[scouts]]
+        current_rows = self.row_by_id[current_drone_ids]
+
+        is_out_of_reach = self.is_end_drone_out_of_reach(scouts, current_rows)
+        self.explore_phases[scouts[is_out_of_reach]] = ExplorePhase.STUCK.value
+        scouts, current_rows = scouts[~is_out_of_reach], current_rows[~is_out_of_reach]
+
+        neighbor_rows = self.neighbor_rows[current_rows]
+        neighbor_bands = self.neighbor_bands[current_rows]
+
+        can_be_chosen = (neighbor_rows >= 0) & ~self.is_visited(scouts, self.drone_ids[neighbor_rows])
+        is_safe = can_be_chosen & (neighbor_bands == SAFE_BAND)
+        is_close = can_be_chosen & (neighbor_bands == CLOSE_BAND)
+        is_danger = can_be_chosen & (neighbor_bands == DANGER_BAND)
+
+        drones_to_choose = np.where(is_safe.any(axis=1)[:, None], is_safe,
+                                    np.where(is_close.any(axis=1)[:, None], is_close, is_danger))
+
+        choices_counts = drones_to_choose.sum(axis=1)
+        random_values = rng_utils.uniforms(self.random_keys[scouts], self.random_counters[scouts])
+        choices = (random_values * choices_counts).astype(np.int64)
+        next_columns = (drones_to_choose.cumsum(axis=1) > choices[:, None]).argmax(axis=1)
+
+        next_rows = neighbor_rows[np.arange(len(scouts)), next_columns]
+        next_distances = self.neighbor_distances[current_rows, next_columns]
+        self.move_to_chosen(scouts, choices_counts, next_rows, next_distances, speed_distances)
+
+    def move_to_chosen(self, scouts, choices_counts, next_rows, next_distances, speed_distances):
+        energy_costs = np.where(next_distances < speed_distances[0], 1, next_distances - speed_distances[0] + 1)
+
+        has_choice = choices_counts > 0
+        self.random_counters[scouts[has_choice]] += 1
+        self.energy_limits[scouts[has_choice]] -= energy_costs[has_choice]
+
+        is_stuck = ~has_choice | (self.energy_limits[scouts] <= 0)
+        self.explore_phases[scouts[is_stuck]] = ExplorePhase.STUCK.value
+
+        moved_scouts = scouts[~is_stuck]
+        next_drone_ids = self.drone_ids[next_rows[~is_stuck]]
+        self.current_drone_indexes[moved_scouts] += 1
+        self.path_lengths[moved_scouts] += 1
+        self.paths[moved_scouts, self.current_drone_indexes[moved_scouts]] = next_drone_ids
+
+        is_end_reached = next_drone_ids == self.end_drone_id
+        self.explore_phases[moved_scouts[is_end_reached]] = ExplorePhase.GOING_BACK_TO_START.value
+
+    def move_back(self, scouts, speed_distances):
+        current_drone_indexes = self.current_drone_indexes[scouts]
+        current_rows = self.row_by_id[self.paths[scouts, current_drone_indexes]]
+        next_drone_ids = self.paths[scouts, current_drone_indexes - 1]
+        next_rows = self.row_by_id[next_drone_ids]
+
+        deltas = self.xy[current_rows] - self.xy[next_rows]
+        distances = np.sqrt((deltas ** 2).sum(axis=1))
+
+        is_stuck = (distances > speed_distances[2]) | (current_rows < 0) | (next_rows < 0)
+        self.explore_phases[scouts[is_stuck]] = ExplorePhase.STUCK.value
+
+        is_moved = ~is_stuck
+        self.way_back_distances[scouts[is_moved], current_drone_indexes[is_moved] - 1] = distances[is_moved]
+
+        is_ended = is_moved & (next_drone_ids == self.start_drone_id)
+        self.explore_phases[scouts[is_ended]] = ExplorePhase.SCOUTING_ENDED.value
+
+        is_moved &= ~is_ended
+        self.current_drone_indexes[scouts[is_moved]] -= 1
+
+    def is_scouting_round_ended(self):
+        return not ((self.explore_phases == ExplorePhase.SEARCHING_END_DRONE.value) |
+                    (self.explore_phases == ExplorePhase.GOING_BACK_TO_START.value)).any()
+
+    def get_path(self, scout_index):
+        return self.paths[scout_index, :self.path_lengths[scout_index]].tolist()
+
+    def get_way_back_distances(self, scout_index):
+        first_index = self.current_drone_indexes[scout_index]
+        if self.explore_phases[scout_index] == ExplorePhase.SCOUTING_ENDED.value:
+            return self.way_back_distances[scout_index, first_index - 1:self.path_lengths[scout_index] - 1].tolist()
+
+        return self.way_back_distances[scout_index, first_index:self.path_lengths[scout_index] - 1][::-1].tolist()
+
+    def get_found_paths(self):
+        found_paths = []
+        for scout_index in np.flatnonzero(self.explore_phases == ExplorePhase.SCOUTING_ENDED.value):
+            found_paths.append((self.get_path(scout_index), self.get_way_back_distances(scout_index)))
+
+        return found_paths
+
+    def get_ended_scouts(self):
+        ended_scouts = []
+        is_ended = (self.explore_phases == ExplorePhase.SCOUTING_ENDED.value) | (self.explore_phases == ExplorePhase.STUCK.value)
+        for scout_index in np.flatnonzero(is_ended):
+            ended_scouts.append((self.scouts[scout_index].id, ExplorePhase(int(self.explore_phases[scout_index])),
+                                 self.get_path(scout_index), self.get_way_back_distances(scout_index)))
+
+        return ended_scouts
+
+    def update_scouts(self, scouts=None):
+        if scouts is None:
+            scouts = self.scouts
+
+        for scout in scouts:
+            scout_index = self.scout_indexes[scout.id]
+            scout.path = self.get_path(scout_index)
+            scout.way_back_distances = self.get_way_back_distances(scout_index)
+            scout.current_drone_index = int(self.current_drone_indexes[scout_index])
+            scout.explore_phase = ExplorePhase(int(self.explore_phases[scout_index]))
+            scout.energy_limit = float(self.energy_limits[scout_index])
+            scout.random_stream.counter = int(self.random_counters[scout_index])
@@ -0,0 +1,51 @@
+import struct
+import numpy as np
+
+FORMAT_VERSION = 2
+
+SCOUT_HEADER = struct.Struct('<BbqqqIBdQ')
+PATH_DTYPES = {2: np.uint16, 8: np.int64}
+WORKER_HEADER = struct.Struct('<BbqqqqdI')
+
+
+def check_format_version(data):
+    if data[0] != FORMAT_VERSION:
+        raise ValueError('Unknown agent format version {}'.format(data[0]))
+
+
+def pack_scout(scout) -> bytes:
+    path = np.asarray(scout.path, dtype=np.int64)
+    if len(path) > 0 and path.min() >= 0 and path.max() < 2 ** 16:
+        path = path.astype(np.uint16)
+
+    way_back_distances = np.asarray(scout.way_back_distances, dtype=np.float64)
+    header = SCOUT_HEADER.pack(FORMAT_VERSION, int(scout.explore_phase), scout.start_drone_id, scout.end_drone_id,
+                               scout.current_drone_index, len(path), path.itemsize, scout.energy_limit,
+                               scout.random_stream.counter)
+    return header + path.tobytes() + way_back_distances.tobytes()
+
+
+def unpack_scout(data: bytes) -> tuple:
+    check_format_version(data)
+    _, explore_phase, start_drone_id, end_drone_id, current_drone_index, path_size, path_item_size, energy_limit, random_counter = SCOUT_HEADER.unpack_from(data)
+
+    path = np.frombuffer(data, dtype=PATH_DTYPES[path_item_size], count=path_size, offset=SCOUT_HEADER.size)
+    way_back_distances = np.frombuffer(data, dtype=np.float64, offset=SCOUT_HEADER.size + path.nbytes)
+    return (start_drone_id, end_drone_id, path.tolist(), way_back_distances.tolist(),
+            current_drone_index, explore_phase, energy_limit, random_counter)
+
+
+def pack_worker(worker) -> bytes:
+    way_back_distances = np.asarray(worker.way_back_distances, dtype=np.float64)
+    header = WORKER_HEADER.pack(FORMAT_VERSION, int(worker.sending_phase), worker.path_id, worker.current_drone_id,
+                                worker.data_id, worker.package_id, worker.next_tick_to_move, len(way_back_distances))
+    return header + way_back_distances.tobytes()
+
+
+def unpack_worker(data: bytes) -> tuple:
+    check_format_version(data)
+    _, sending_phase, path_id, current_drone_id, data_id, package_id, next_tick_to_move, _ = WORKER_HEADER.unpack_from(data)
+
+    way_back_distances = np.frombuffer(data, dtype=np.float64, offset=WORKER_HEADER.size)
+    return (path_id, current_drone_id, data_id, package_id, next_tick_to_move,
+            way_back_distances.tolist(), sending_phase)
\ No newline at end of file
@@ -0,0 +1,144 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import time
+from multiprocessing import get_context
+from typing import Dict, List
+
+import yaml
+from mpi4py import MPI
+from repast4py import parameters
+
+from params_utils import check_params
+
+
+def expand_sweep(sweep: Dict) -> List[Dict]:
+    grid = sweep.get('grid', {})
+    keys = list(grid.keys())
+
+    configs = []
+    for overrides in sweep.get('runs', [{}]):
+        for values in itertools.product(*(grid[key] for key in keys)):
+            config = dict(overrides)
+            config.update(zip(keys, values))
+            configs.append(config)
+
+    return configs
+
+
+def redirect_log_files(params: Dict, run_dir: str):
+    for key in params.keys():
+        if key.endswith('_log_file'):
+            params[key] = os.path.join(run_dir, os.path.basename(params[key]))
+
+
+def get_run_summary(model) -> Dict:
+    return {
+        'tick': model.runner.schedule.tick,
+        'delivered': model.data_controller.get_packages_count(2),
+        'lost': model.data_controller.get_packages_count(-1),
+        'not_delivered': model.data_controller.get_packages_count(0) + model.data_controller.get_packages_count(1),
+        'paths_found': model.paths_controller.new_path_id,
+        'paths_can_be_used': len(model.paths_controller.get_paths_can_be_used()),
+    }
+
+
+def run_config(parameters_file: str, run_id: int, overrides: Dict, output_dir: str, comm: MPI.Intracomm = None) -> Dict:
+    # imported here so that pool processes initialize the model modules themselves
+    from bee_ad_hoc import run
+
+    if comm is None:
+        comm = MPI.COMM_SELF
+
+    summary = {'run_id': run_id, 'overrides': json.dumps(overrides, sort_keys=True)}
+    run_dir = os.path.join(output_dir, 'run_{:05d}'.format(run_id))
+    params = parameters.init_params(parameters_file, json.dumps(overrides))
+
+    is_valid, message = check_params(params)
+    if not is_valid:
+        summary.update(status='invalid', message=message)
+        return summary
+
+    redirect_log_files(params, run_dir)
+    os.makedirs(run_dir, exist_ok=True)
+    if comm.Get_rank() == 0:
+        with open(os.path.join(run_dir, 'params.json'), 'w') as fout:
+            json.dump(params, fout, indent=2, sort_keys=True)
+
+    start_time = time.perf_counter()
+    model = run(params, comm)
+    summary.update(status='ok', message='', wall_time=time.perf_counter() - start_time)
+    summary.update(get_run_summary(model))
+    summary.update(model.metrics.get_summary())
+    return summary
+
+
+def run_config_args(args):
+    return run_config(*args)
+
+
+def run_pool(parameters_file: str, configs: List[Dict], output_dir: str, processes: int) -> List[Dict]:
+    args = [(parameters_file, run_id, overrides, output_dir) for run_id, overrides in enumerate(configs)]
+    with get_context('spawn').Pool(processes) as pool:
+        return list(pool.imap_unordered(run_config_args, args))
+
+
+def run_mpi(parameters_file: str, configs: List[Dict], output_dir: str, ranks_per_run: int) -> List[Dict]:
+    comm = MPI.COMM_WORLD
+    groups_count = comm.Get_size() // ranks_per_run
+    group = comm.Get_rank() // ranks_per_run
+    if group >= groups_count:
+        group = MPI.UNDEFINED
+
+    group_comm = comm.Split(group, comm.Get_rank())
+    summaries = []
+    if group != MPI.UNDEFINED:
+        for run_id in range(group, len(configs), groups_count):
+            summary = run_config(parameters_file, run_id, configs[run_id], output_dir, group_comm)
+            if group_comm.Get_rank() == 0:
+                summaries.append(summary)
+
+    return [summary for rank_summaries in comm.gather(summaries) or [] for summary in rank_summaries]
+
+
+def write_summary(fpath: str, summaries: List[Dict]):
+    summaries = sorted(summaries, key=lambda summary: summary['run_id'])
+    headers = []
+    for summary in summaries:
+        headers.extend(key for key in summary.keys() if key not in headers)
+
+    with open(fpath, 'w', newline='') as fout:
+        writer = csv.DictWriter(fout, fieldnames=headers)
+        writer.writeheader()
+        writer.writerows(summaries)
+
+
+def run_sweep(parameters_file: str, sweep_file: str, output_dir: str, processes: int, ranks_per_run: int):
+    with open(sweep_file) as fin:
+        sweep = yaml.load(fin, Loader=yaml.SafeLoader)
+
+    configs = expand_sweep(sweep)
+    os.makedirs(output_dir, exist_ok=True)
+
+    if MPI.COMM_WORLD.Get_size() > 1:
+        summaries = run_mpi(parameters_file, configs, output_dir, ranks_per_run)
+        if MPI.COMM_WORLD.Get_rank() != 0:
+            return
+    else:
+        summaries = run_pool(parameters_file, configs, output_dir, processes)
+
+    write_summary(os.path.join(output_dir, 'summary.csv'), summaries)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("parameters_file", help="parameters file (yaml format)")
+    parser.add_argument("sweep_file", help="sweep file (yaml format) with a 'grid' of values and/or a list of 'runs' overrides")
+    parser.add_argument("--output_dir", default="output/sweep", help="directory for the run directories and summary.csv")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(), help="size of the process pool when not run under mpirun")
+    parser.add_argument("--ranks_per_run", type=int, default=1, help="ranks of the sub-communicator of each run under mpirun")
+    args = parser.parse_args()
+
+    run_sweep(args.parameters_file, args.sweep_file, args.output_dir, args.processes, args.ranks_per_run)
@@ -1,15 +1,17 @@
+import os
+import sys
 import pandas as pd
 
-def print_scouting_info():
-    df = pd.read_csv('output/scouting_log.csv')
+def print_scouting_info(fpath):
+    df = pd.read_csv(fpath)
 
     print('-----SCOUTING INFO-----')
     print('Count of scounting stages:', len(df))
     print('Average count of found paths:', df['paths_count'].mean())
 
 
-def print_package_info():
-    df = pd.read_csv('output/data_state_log.csv')
+def print_package_info(fpath):
+    df = pd.read_csv(fpath)
 
     print('-----PACKAGE INFO-----')
     print('Count of delivered packages:', len(df[df['state'] == 2]))
@@ -26,13 +28,16 @@ def print_package_info():
     
 
     df_group_by_data_id = df.groupby(['data_id'])
-    df_lifetimes = df_group_by_data_id['tick'].max() - df_group_by_package_id['tick'].min()
+    df_lifetimes = df_group_by_data_id['tick'].max() - df_group_by_data_id['tick'].min()
     print('Min lifetime of data:', df_lifetimes.min())
     print('Max lifetime of data:', df_lifetimes.max())
     print('Average lifetime of data:', df_lifetimes.mean())
-    # print('Average count of found paths:', df['paths_count'].mean())
 
 
-print_scouting_info()
-print()
-print_package_info()
\ No newline at end of file
+if __name__ == '__main__':
+    # the model writes the same summary to summary_log_file while it runs, this reads the full logs of a finished run
+    output_dir = sys.argv[1] if len(sys.argv) > 1 else 'output'
+
+    print_scouting_info(os.path.join(output_dir, 'scouting_log.csv'))
+    print()
+    print_package_info(os.path.join(output_dir, 'data_state_log.csv'))
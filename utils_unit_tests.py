@@ -10,6 +10,27 @@ from drone_agent import Drone
 from path_utils import PathsController
 from scout_agent import Scout, ExplorePhase
 from worker_agent import Worker, SendingPhase
+from index_utils import DronesIndex, get_neighbor_table, pad_neighbor_table
+from positions_utils import DronePositions
+from connectivity_utils import ConnectivityCache, SAFE_BAND, CLOSE_BAND, DANGER_BAND
+from repair_utils import PathRepair
+from log_utils import BufferedLogger, read_npz_log
+from schedule_utils import WorkerScheduler
+from distributed_utils import SharedEvents, is_in_bounds
+from balance_utils import LoadBalancer
+import sweep
+import benchmark
+import rng_utils
+from metrics_utils import MetricsCollector
+from profile_utils import PhaseProfiler, MessageCounter
+import serialization_utils
+
+import os
+import tempfile
+import time
+import numpy as np
+from mpi4py import MPI
+from repast4py import space
 
 class DistanceUtilsTests(unittest.TestCase):
 
@@ -87,6 +108,135 @@ class AgentUtilsTests(unittest.TestCase):
         self.assertEqual(worker.sending_phase, newWorker.sending_phase)
         self.assertListEqual(worker.way_back_distances, newWorker.way_back_distances)
 
+    def test_restore_agent_CachedWorker_CachedWorkerUpdated(self):
+        worker = Worker(100, 0, 0, 0, 0, 0, 5)
+        cached_worker = agent_utils.restore_agent(worker.save())
+        worker.current_drone_id = 7
+        worker.sending_phase = SendingPhase.GOING_BACK_TO_START
+
+        newWorker = agent_utils.restore_agent(worker.save())
+
+        self.assertIs(cached_worker, newWorker)
+        self.assertEqual(7, newWorker.current_drone_id)
+        self.assertEqual(SendingPhase.GOING_BACK_TO_START, newWorker.sending_phase)
+
+    def test_restore_agent_CachedScout_SameListsRefilled(self):
+        scout = Scout(200, 1, 0, 9, 5)
+        scout.path = [0, 4]
+        scout.way_back_distances = [2.5]
+        cached_scout = agent_utils.restore_agent(scout.save())
+        path, way_back_distances = cached_scout.path, cached_scout.way_back_distances
+        scout.path = [0, 4, 9]
+        scout.way_back_distances = [2.5, 3.0]
+
+        newScout = agent_utils.restore_agent(scout.save())
+
+        self.assertIs(path, newScout.path)
+        self.assertIs(way_back_distances, newScout.way_back_distances)
+        self.assertListEqual([0, 4, 9], newScout.path)
+        self.assertListEqual([2.5, 3.0], newScout.way_back_distances)
+        self.assertSetEqual({0, 4, 9}, newScout.visited_drone_ids)
+
+    def test_restore_agent_SameDataAsCachedWorker_UpdateSkipped(self):
+        worker = Worker(200, 1, 0, 0, 0, 0, 5)
+        agent_data = worker.save()
+        cached_worker = agent_utils.restore_agent(agent_data)
+        cached_worker.current_drone_id = 7
+
+        newWorker = agent_utils.restore_agent((agent_data[0], bytes(agent_data[1])))
+
+        self.assertIs(cached_worker, newWorker)
+        self.assertEqual(7, newWorker.current_drone_id)
+
+    def test_restore_agent_CachedWorkerSaved_UpdatedAgain(self):
+        worker = Worker(201, 1, 0, 0, 0, 0, 5)
+        agent_data = worker.save()
+        cached_worker = agent_utils.restore_agent(agent_data)
+        cached_worker.current_drone_id = 7
+        cached_worker.save()
+
+        newWorker = agent_utils.restore_agent(agent_data)
+
+        self.assertEqual(0, newWorker.current_drone_id)
+
+    def test_add_MaxSizeReached_LeastRecentlyUsedAgentEvicted(self):
+        agent_cache = agent_utils.AgentCache(2)
+        agent_cache.add((0, 0, 0), 'a')
+        agent_cache.add((1, 0, 0), 'b')
+        agent_cache.get((0, 0, 0))
+
+        agent_cache.add((2, 0, 0), 'c')
+
+        self.assertNotIn((1, 0, 0), agent_cache)
+        self.assertIn((0, 0, 0), agent_cache)
+        self.assertEqual((2, 1, 0, 1), agent_cache.get_stats())
+
+    def test_clear_CachedAgents_CacheAndStatsEmpty(self):
+        agent_cache = agent_utils.AgentCache()
+        agent_cache.add((0, 2, 0), 'worker')
+        agent_cache.get((0, 2, 0))
+
+        agent_cache.clear()
+
+        self.assertEqual(0, len(agent_cache))
+        self.assertEqual((0, 0, 0, 0), agent_cache.get_stats())
+
+    def test_evict_CachedAgent_AgentRemovedAndCounted(self):
+        agent_cache = agent_utils.AgentCache()
+        agent_cache.add((0, 2, 0), 'worker')
+
+        agent_cache.evict((0, 2, 0))
+        agent_cache.get((0, 2, 0))
+
+        self.assertEqual((0, 0, 1, 1), agent_cache.get_stats())
+
+    def test_evict_missing_AgentsLeftRank_OnlyPresentAgentsKept(self):
+        agent_cache = agent_utils.AgentCache()
+        for uid in [(0, 2, 0), (1, 2, 0), (2, 0, 1)]:
+            agent_cache.add(uid, 'agent')
+
+        agent_cache.evict_missing(lambda uid: uid == (1, 2, 0))
+
+        self.assertListEqual([(1, 2, 0)], list(agent_cache.agents))
+        self.assertEqual(2, agent_cache.evictions)
+
+class SerializationUtilsTests(unittest.TestCase):
+
+    def test_unpack_scout_PackedScout_ReturnSameFields(self):
+        scout = Scout(3, 0, 0, 9, 42.5)
+        scout.path = [0, 4, 9]
+        scout.way_back_distances = [2.5, 3.0]
+        scout.current_drone_index = 2
+        scout.explore_phase = ExplorePhase.GOING_BACK_TO_START
+
+        fields = serialization_utils.unpack_scout(serialization_utils.pack_scout(scout))
+
+        self.assertEqual((0, 9, [0, 4, 9], [2.5, 3.0], 2, 1, 42.5, 0), fields)
+
+    def test_unpack_scout_LargeDroneIds_ReturnSamePath(self):
+        scout = Scout(3, 0, 0, 70000, 10)
+        scout.path = [0, 70000]
+
+        fields = serialization_utils.unpack_scout(serialization_utils.pack_scout(scout))
+
+        self.assertListEqual([0, 70000], fields[2])
+
+    def test_restore_agent_MigratedScout_SameRandomStream(self):
+        scout = Scout(11, 0, 0, 9, 10)
+        scout.random_stream.random()
+
+        restored_scout = agent_utils.create_agent(scout.uid, scout.save())
+        agent_utils.update_agent(restored_scout, scout.save())
+
+        self.assertEqual(scout.random_stream.random(), restored_scout.random_stream.random())
+
+    def test_unpack_worker_UnknownFormatVersion_RaiseValueError(self):
+        data = bytearray(serialization_utils.pack_worker(Worker(0, 0, 0, 0, 0, 0, 5)))
+        data[0] = serialization_utils.FORMAT_VERSION + 1
+
+        with self.assertRaises(ValueError):
+            serialization_utils.unpack_worker(bytes(data))
+
 class DataUtilsTests(unittest.TestCase):
 
     def test_add_data_NewData_AddedNewData(self):
@@ -142,8 +292,69 @@ class DataUtilsTests(unittest.TestCase):
 
         self.assertEqual(True, is_all_packages_delivered_or_lost)
 
+    def test_get_not_sent_packages_SomePackagesSent_ReturnRestInDataOrder(self):
+        data_controller = DataController()
+        data_controller.add_data(3)
+        data_controller.add_data(3)
+
+        data_controller.datas[0].packages[1].package_state = 1
+        data_controller.datas[1].packages[0].package_state = 2
+        not_sent_packages = data_controller.get_not_sent_packages()
+
+        self.assertListEqual([(0, 0), (0, 2), (1, 1), (1, 2)],
+                             [(data_id, package.package_id) for data_id, package in not_sent_packages])
+
+    def test_get_packages_count_PackagesChangedState_ReturnCountsByState(self):
+        data_controller = DataController()
+        data_controller.add_data(4)
+
+        data_controller.datas[0].packages[0].package_state = 1
+        data_controller.datas[0].packages[1].package_state = 1
+        data_controller.datas[0].packages[1].package_state = -1
+
+        self.assertEqual(2, data_controller.get_packages_count(0))
+        self.assertEqual(1, data_controller.get_packages_count(1))
+        self.assertEqual(1, data_controller.get_packages_count(-1))
+        self.assertEqual(0, data_controller.get_packages_count(2))
+
 class PathUtilsTests(unittest.TestCase):
 
+    def test_update_paths_health_DroneMovedAway_PathUnusable(self):
+        paths_controller = PathsController([5, 10, 15])
+        paths_controller.try_add_path([0, 1, 2], [4, 4])
+        paths_controller.try_add_path([3, 4], [4])
+        drones = [Drone(0, 0, dpt(0, 0)), Drone(1, 0, dpt(0, 4)), Drone(2, 0, dpt(0, 14)), Drone(3, 0, dpt(20, 0)), Drone(4, 0, dpt(20, 3))]
+
+        result = paths_controller.update_paths_health(drones)
+
+        self.assertEqual((2, 1, 0), result)
+        self.assertFalse(paths_controller.paths[0].is_can_be_used)
+        self.assertListEqual([1], [path.path_id for path in paths_controller.get_paths_can_be_used()])
+
+    def test_update_paths_health_DronesMoved_PathUpdatedInPlace(self):
+        paths_controller = PathsController([5, 10, 15])
+        paths_controller.try_add_path([0, 1, 2], [4, 4])
+        path = paths_controller.paths[0]
+        path.set_connection_business((0, 1), True)
+        drones = [Drone(0, 0, dpt(0, 0)), Drone(1, 0, dpt(0, 3)), Drone(2, 0, dpt(0, 9))]
+
+        paths_controller.update_paths_health(drones)
+
+        self.assertIs(path, paths_controller.paths[0])
+        self.assertListEqual([3.0, 6.0], path.distances)
+        self.assertEqual((1 + 1 / 2) / 2, path.speed)
+        self.assertTrue(path.connection_business[(0, 1)])
+
+    def test_update_paths_health_DroneNotFound_PathLeftAsItIs(self):
+        paths_controller = PathsController([5, 10, 15])
+        paths_controller.try_add_path([0, 1, 2], [4, 4])
+
+        result = paths_controller.update_paths_health([Drone(0, 0, dpt(0, 0)), Drone(1, 0, dpt(0, 40))])
+
+        self.assertEqual((0, 0, 1), result)
+        self.assertListEqual([4, 4], paths_controller.paths[0].distances)
+        self.assertTrue(paths_controller.paths[0].is_can_be_used)
+
     def test_try_add_path_PathCloseToDisconnect_ReturnFalse(self):
         paths_controller = PathsController([5, 10, 15])
 
@@ -184,6 +395,29 @@ class PathUtilsTests(unittest.TestCase):
 
         self.assertEqual(False, result)
 
+    def test_try_add_path_IntersectPathMarkedUnusable_ReturnTrue(self):
+        paths_controller = PathsController([5, 10, 15])
+
+        paths_controller.try_add_path([0, 1, 2], [6, 6])
+        paths_controller.try_add_path([0, 3, 2], [6, 6])
+        paths_controller.paths[1].is_can_be_used = False
+        result = paths_controller.try_add_path([0, 1, 3, 2], [5, 5, 5])
+
+        self.assertEqual(True, result)
+        self.assertEqual(False, paths_controller.paths[0].is_can_be_used)
+
+    def test_get_paths_can_be_used_PathRestoredByUpdate_ReturnPathsInIdOrder(self):
+        paths_controller = PathsController([5, 10, 15])
+
+        paths_controller.try_add_path([0, 1, 2], [6, 6])
+        paths_controller.try_add_path([0, 3, 2], [6, 6])
+        paths_controller.paths[0].is_can_be_used = False
+        paths_controller.update_path_distances(0, [6, 6])
+
+        paths = paths_controller.get_paths_can_be_used()
+
+        self.assertListEqual([0, 1], [path.path_id for path in paths])
+
     def test_update_path_distances_PathCannotBeUsedMore_ChangedFieldCanBeUsedToFalse(self):
         paths_controller = PathsController([5, 10, 15])
 
@@ -220,6 +454,608 @@ class PathUtilsTests(unittest.TestCase):
 
         self.assertEqual(0, len(paths))
 
-    
+    def test_try_add_path_SlowerDuplicate_RejectedAndCounted(self):
+        paths_controller = PathsController([5, 10, 15])
+        paths_controller.try_add_path([0, 1, 2], [4, 4])
+
+        result = paths_controller.try_add_path([0, 1, 2], [4, 8])
+
+        self.assertEqual(False, result)
+        self.assertEqual(1, paths_controller.new_path_id)
+        self.assertEqual((2, 1), (paths_controller.submitted_paths_count, paths_controller.duplicate_paths_count))
+
+    def test_try_add_path_FasterDuplicate_DistancesMergedIntoPath(self):
+        paths_controller = PathsController([5, 10, 15])
+        paths_controller.try_add_path([0, 1, 2], [4, 8])
+        path = paths_controller.paths[0]
+
+        result = paths_controller.try_add_path([0, 1, 2], [4, 4])
+
+        self.assertEqual(True, result)
+        self.assertEqual(1, paths_controller.duplicate_paths_count)
+        self.assertEqual(1, paths_controller.new_path_id)
+        self.assertListEqual([path], paths_controller.get_paths_can_be_used())
+        self.assertListEqual([4, 4], path.distances)
+        self.assertEqual({(0, 1, 2): 0}, paths_controller.drones_path_ids)
+
+    def test_try_add_path_DuplicateOfUnusablePath_NotCounted(self):
+        paths_controller = PathsController([5, 10, 15])
+        paths_controller.try_add_path([0, 1, 2], [4, 4])
+        paths_controller.paths[0].is_can_be_used = False
+
+        result = paths_controller.try_add_path([0, 1, 2], [4, 8])
+
+        self.assertEqual(True, result)
+        self.assertEqual(0, paths_controller.duplicate_paths_count)
+
+    def test_try_repair_path_PathCanBeUsed_ReturnFalse(self):
+        paths_controller = PathsController([5, 10, 15])
+        paths_controller.try_add_path([0, 1, 2], [6, 6])
+
+        result = paths_controller.try_repair_path(0, [0, 3, 2], [4, 4])
+
+        self.assertEqual(False, result)
+        self.assertListEqual([0, 1, 2], paths_controller.paths[0].drones_path)
+
+    def test_try_repair_path_PathBroken_PathReplacedWithSameId(self):
+        paths_controller = PathsController([5, 10, 15])
+        paths_controller.try_add_path([0, 1, 2], [6, 6])
+        old_path = paths_controller.paths[0]
+        old_path.is_can_be_used = False
+
+        result = paths_controller.try_repair_path(0, [0, 3, 2], [4, 4])
+        old_path.is_can_be_used = True
+
+        self.assertEqual(True, result)
+        self.assertEqual(1, paths_controller.new_path_id)
+        self.assertListEqual([0, 3, 2], paths_controller.paths[0].drones_path)
+        self.assertListEqual([paths_controller.paths[0]], paths_controller.get_paths_can_be_used())
+
+class RepairUtilsTests(unittest.TestCase):
+
+    def test_get_repaired_path_DetourFound_DetourSplicedIn(self):
+        paths_controller = PathsController([5, 10, 15])
+        paths_controller.try_add_path([0, 1, 2], [4, 4])
+        drones = [Drone(0, 0, dpt(0, 0)), Drone(1, 0, dpt(0, 4)), Drone(2, 0, dpt(0, 16)), Drone(3, 0, dpt(0, 9))]
+        paths_controller.update_paths_health(drones)
+        path_repair = PathRepair(paths_controller.paths[0], 0, 1, 50, [5, 10, 15])
+
+        while not path_repair.is_ended():
+            path_repair.explore(DronesIndex(drones, 15))
+        repaired_path = path_repair.get_repaired_path()
+
+        self.assertEqual(([0, 1, 3, 2], [4.0, 5.0, 7.0]), repaired_path)
+        self.assertEqual(True, paths_controller.try_repair_path(0, *repaired_path))
+
+    def test_get_repaired_path_TwoBrokenHops_EachHopDetourSplicedIn(self):
+        paths_controller = PathsController([5, 10, 15])
+        paths_controller.try_add_path([0, 1, 2, 3], [4, 4, 4])
+        drones = [Drone(0, 0, dpt(0, 0)), Drone(1, 0, dpt(0, 4)), Drone(2, 0, dpt(0, 16)), Drone(3, 0, dpt(0, 28)),
+                  Drone(4, 0, dpt(0, 9)), Drone(5, 0, dpt(0, 22))]
+        paths_controller.update_paths_health(drones)
+        path_repair = PathRepair(paths_controller.paths[0], 0, 3, 50, [5, 10, 15])
+
+        while not path_repair.is_ended():
+            path_repair.explore(DronesIndex(drones, 15))
+
+        self.assertEqual(([0, 1, 4, 2, 5, 3], [4.0, 5.0, 7.0, 6.0, 6.0]), path_repair.get_repaired_path())
+        self.assertEqual(4, path_repair.detour_hops)
+        self.assertEqual(6, path_repair.scouts_count)
+
+    def test_get_repaired_path_NoDetour_ReturnNone(self):
+        paths_controller = PathsController([5, 10, 15])
+        paths_controller.try_add_path([0, 1, 2], [4, 4])
+        drones = [Drone(0, 0, dpt(0, 0)), Drone(1, 0, dpt(0, 4)), Drone(2, 0, dpt(0, 40))]
+        paths_controller.update_paths_health(drones)
+        path_repair = PathRepair(paths_controller.paths[0], 0, 2, 50, [5, 10, 15])
+
+        path_repair.explore(DronesIndex(drones, 15))
+
+        self.assertEqual(True, path_repair.is_ended())
+        self.assertEqual(None, path_repair.get_repaired_path())
+
+class IndexUtilsTests(unittest.TestCase):
+
+    def test_get_neighbors_DronesInFarCells_ReturnOnlyNearDrones(self):
+        drones = [Drone(0, 0, dpt(0, 0)), Drone(1, 0, dpt(14, 14)), Drone(2, 0, dpt(40, 40)), Drone(3, 0, dpt(0, 31))]
+        drones_index = DronesIndex(drones, 15)
+
+        neighbors = drones_index.get_neighbors(dpt(0, 0))
+
+        self.assertListEqual([drones[0], drones[1]], neighbors)
+
+    def test_get_neighbors_DronesInDifferentCells_ReturnInListOrder(self):
+        drones = [Drone(0, 0, dpt(20, 20)), Drone(1, 0, dpt(1, 1)), Drone(2, 0, dpt(16, 2)), Drone(3, 0, dpt(2, 16))]
+        drones_index = DronesIndex(drones, 15)
+
+        neighbors = drones_index.get_neighbors(dpt(10, 10))
+
+        self.assertListEqual(drones, neighbors)
+
+    def test_find_agent_by_id_DronesIndexHasId_ReturnDrone(self):
+        drones = [Drone(i, 0, dpt(i, i)) for i in range(10)]
+        drones_index = DronesIndex(drones, 15)
+
+        self.assertEqual(drones[7], distance_utils.find_agent_by_id(drones_index, 7))
+
+    def test_find_agent_by_id_DronesIndexHasNoId_ReturnNone(self):
+        drones = [Drone(i, 0, dpt(i, i)) for i in range(10)]
+        drones_index = DronesIndex(drones, 15)
+
+        self.assertEqual(None, distance_utils.find_agent_by_id(drones_index, 11))
+
+    def test_get_neighbor_table_ShuffledDrones_SameNeighborsAsAllPairs(self):
+        xy = np.random.default_rng(0).integers(0, 100, size=(200, 2))
+        drone_ids = np.random.default_rng(1).permutation(200)
+
+        indptr, indices, distances = get_neighbor_table(drone_ids, xy, 15)
+
+        for row in range(200):
+            all_distances = np.sqrt(((xy - xy[row]) ** 2).sum(axis=1))
+            true_rows = [other for other in np.argsort(drone_ids) if other != row and all_distances[other] <= 15]
+            self.assertListEqual(true_rows, indices[indptr[row]:indptr[row + 1]].tolist())
+            self.assertListEqual(all_distances[true_rows].tolist(), distances[indptr[row]:indptr[row + 1]].tolist())
+
+    def test_pad_neighbor_table_NoNeighbors_OnePaddedColumn(self):
+        padded_rows = pad_neighbor_table(np.zeros(3, dtype=np.int64), np.zeros(0, dtype=np.int64), -1)
+
+        self.assertListEqual([[-1], [-1]], padded_rows.tolist())
+
+class PositionsUtilsTests(unittest.TestCase):
+
+    def test_fly_DronesOnBorders_PositionsClampedToBounds(self):
+        drones = [Drone(0, 0, dpt(0, 0)), Drone(1, 0, dpt(9, 9))]
+        drone_positions = DronePositions(drones, space.BoundingBox(0, 10, 0, 10, 0, 0))
+
+        visited_points = set()
+        for _ in range(50):
+            drone_positions.fly(Drone.OFFSETS)
+            visited_points.update(map(tuple, drone_positions.xy.tolist()))
+
+        self.assertTrue((drone_positions.xy >= 0).all())
+        self.assertTrue((drone_positions.xy <= 9).all())
+        self.assertGreater(len(visited_points), 2)
+
+    def test_fly_SomeDronesMoved_ReturnMovedRows(self):
+        drones = [Drone(i, 0, dpt(5, 5)) for i in range(20)]
+        drone_positions = DronePositions(drones, space.BoundingBox(0, 10, 0, 10, 0, 0))
+
+        moved_rows = drone_positions.fly(Drone.OFFSETS)
+
+        self.assertListEqual([row for row in range(20) if drone_positions.xy[row].tolist() != [5, 5]], moved_rows.tolist())
+
+    def test_fly_AttachedDrones_DronePointsReadFromTable(self):
+        drones = [Drone(0, 0, dpt(5, 5)), Drone(1, 0, dpt(3, 3))]
+        drone_positions = DronePositions(drones, space.BoundingBox(0, 10, 0, 10, 0, 0))
+
+        drone_positions.fly(Drone.OFFSETS)
+
+        self.assertEqual((drones[1].pt.x, drones[1].pt.y), tuple(drone_positions.xy[1]))
+
+    def test_find_agent_by_id_DronePositionsHasId_ReturnDrone(self):
+        drones = [Drone(i, 0, dpt(i, i)) for i in range(10)]
+        drone_positions = DronePositions(drones, space.BoundingBox(0, 10, 0, 10, 0, 0))
+
+        self.assertEqual(drones[3], distance_utils.find_agent_by_id(drone_positions, 3))
+
+    def test_cluster_by_location_SameDrones_SameClustersAsDronesList(self):
+        drones = [Drone(i, 0, dpt((i * 7) % 60, (i * 13) % 60)) for i in range(40)]
+        true_result = distance_utils.cluster_drones_by_distance(drones, dpt(30, 30), [5, 10, 15], [0, 5])
+        drone_positions = DronePositions(drones, space.BoundingBox(0, 60, 0, 60, 0, 0))
+
+        result = drone_positions.cluster_by_location(dpt(30, 30), [5, 10, 15], [0, 5])
+
+        self.assertDictEqual(true_result, result)
+
+    def test_fly_SameDronesAsAgents_SamePositionsAsDroneFly(self):
+        box = space.BoundingBox(0, 10, 0, 10, 0, 0)
+        grid = space.SharedGrid(name='grid', bounds=box, borders=space.BorderType.Sticky,
+                                occupancy=space.OccupancyType.Multiple, buffer_size=2, comm=MPI.COMM_WORLD)
+        drones = [Drone(i, 0, dpt(i, i)) for i in range(5)]
+        drone_positions = DronePositions([Drone(i, 0, dpt(i, i)) for i in range(5)], box)
+        for drone in drones:
+            grid.add(drone)
+            grid.move(drone, drone.pt)
+
+        for _ in range(10):
+            for drone in drones:
+                drone.fly(grid)
+            drone_positions.fly(Drone.OFFSETS)
+
+        self.assertListEqual([[drone.pt.x, drone.pt.y] for drone in drones], drone_positions.xy.tolist())
+
+class ConnectivityUtilsTests(unittest.TestCase):
+
+    def test_init_DronesInRadius_AdjacencyWithBandsOrderedById(self):
+        drones = [Drone(3, 0, dpt(0, 0)), Drone(1, 0, dpt(0, 4)), Drone(2, 0, dpt(0, 8)), Drone(0, 0, dpt(0, 14))]
+
+        connectivity = ConnectivityCache(drones, [5, 10, 15], 0)
+
+        self.assertListEqual([0, 2, 3], connectivity.drone_ids[connectivity.get_neighbors(1)].tolist())
+        self.assertListEqual([CLOSE_BAND, SAFE_BAND, SAFE_BAND], connectivity.bands[connectivity.indptr[1]:connectivity.indptr[2]].tolist())
+        self.assertListEqual([0, 1, 2], connectivity.drone_ids[connectivity.get_neighbors(0)].tolist())
+        self.assertEqual(DANGER_BAND, connectivity.bands[connectivity.indptr[0]])
+
+    def test_get_hop_distance_TwoComponents_UnreachableDronesNegative(self):
+        drones = [Drone(i, 0, dpt(0, i * 12)) for i in range(3)] + [Drone(3, 0, dpt(50, 50))]
+
+        connectivity = ConnectivityCache(drones, [5, 10, 15], 2)
+
+        self.assertListEqual([2, 1, 0, -1], [connectivity.get_hop_distance(i) for i in range(4)])
+        self.assertTrue(connectivity.is_connected(0, 2))
+        self.assertFalse(connectivity.is_connected(0, 3))
+
+    def test_get_padded_neighbors_DifferentDegrees_PaddedWithNegativeRows(self):
+        drones = [Drone(0, 0, dpt(0, 0)), Drone(1, 0, dpt(0, 4)), Drone(2, 0, dpt(0, 8)), Drone(3, 0, dpt(50, 50))]
+
+        neighbor_rows, neighbor_bands, _ = ConnectivityCache(drones, [5, 10, 15], 2).get_padded_neighbors()
+
+        self.assertListEqual([[1, 2], [0, 2], [0, 1], [-1, -1]], neighbor_rows.tolist())
+        self.assertEqual(-1, neighbor_bands[3, 0])
+
+class RngUtilsTests(unittest.TestCase):
+
+    def test_uniforms_SameKeysAndCounters_SameValuesAsUniform(self):
+        keys = rng_utils.get_stream_keys(1, [0, 7, 70000])
+        true_result = [rng_utils.uniform(rng_utils.get_stream_key(1, agent_id), 3) for agent_id in [0, 7, 70000]]
+
+        result = rng_utils.uniforms(keys, [3, 3, 3])
+
+        self.assertListEqual(true_result, result.tolist())
+
+    def test_random_RestoredCounter_ContinueSameStream(self):
+        random_stream = rng_utils.RandomStream(0, 5)
+        [random_stream.random() for _ in range(3)]
+        true_result = random_stream.random()
+
+        result = rng_utils.RandomStream(0, 5, counter=3).random()
+
+        self.assertEqual(true_result, result)
+
+    def test_random_DifferentAgents_DifferentStreams(self):
+        self.assertNotEqual(rng_utils.RandomStream(1, 0).random(), rng_utils.RandomStream(1, 1).random())
+        self.assertNotEqual(rng_utils.RandomStream(0, 1).random(), rng_utils.RandomStream(1, 1).random())
+
+class MetricsUtilsTests(unittest.TestCase):
+
+    def create_collector(self):
+        ticks = [0]
+        data_controller = DataController()
+        metrics = MetricsCollector(lambda: ticks[0])
+        data_controller.on_package_state_changed = metrics.update_package_state
+        return ticks, data_controller, metrics
+
+    def test_update_package_state_PackagesFinished_LifetimesFromDataCreation(self):
+        ticks, data_controller, metrics = self.create_collector()
+        ticks[0] = 10
+        data = data_controller.add_data(2)
+        metrics.add_data(data)
+
+        ticks[0] = 15
+        data.packages[0].package_state = 1
+        ticks[0] = 20
+        data.packages[0].package_state = 2
+        ticks[0] = 40
+        data.packages[1].package_state = -1
+
+        self.assertEqual(1, metrics.delivered_count)
+        self.assertEqual(1, metrics.lost_count)
+        self.assertEqual(10, metrics.package_lifetimes.min)
+        self.assertEqual(30, metrics.package_lifetimes.max)
+        self.assertEqual(20, metrics.package_lifetimes.get_mean())
+        self.assertEqual(30, metrics.data_lifetimes.min)
+        self.assertEqual(1, metrics.data_lifetimes.count)
+
+    def test_update_package_state_DataFinished_DataNotKept(self):
+        ticks, data_controller, metrics = self.create_collector()
+        data = data_controller.add_data(1)
+        metrics.add_data(data)
+
+        data.packages[0].package_state = 1
+        self.assertEqual(1, len(metrics.datas_in_flight))
+        data.packages[0].package_state = 2
+
+        self.assertEqual(0, len(metrics.datas_in_flight))
+
+    def test_get_summary_NothingCollected_NoLifetimes(self):
+        _, _, metrics = self.create_collector()
+        metrics.add_scouting_stage(3)
+        metrics.add_scouting_stage(4)
+
+        summary = dict(metrics.get_summary())
+
+        self.assertEqual(2, summary['scouting_stages_count'])
+        self.assertEqual(3.5, summary['found_paths_mean'])
+        self.assertEqual(0, summary['delivered_packages_count'])
+        self.assertIsNone(summary['package_lifetime_mean'])
+
+    def test_get_summary_PathsSubmitted_DistinctPathsShare(self):
+        _, _, metrics = self.create_collector()
+        metrics.get_paths_submissions = lambda: (4, 1)
+
+        summary = dict(metrics.get_summary())
+
+        self.assertEqual(4, summary['submitted_paths_count'])
+        self.assertEqual(1, summary['duplicate_paths_count'])
+        self.assertEqual(0.75, summary['distinct_paths_share'])
+
+class ProfileUtilsTests(unittest.TestCase):
+
+    def test_wrap_NestedPhases_ChildTimeExcludedFromParent(self):
+        profiler = PhaseProfiler()
+        inner = profiler.wrap('inner', lambda: time.sleep(0.02))
+        outer = profiler.wrap('outer', lambda: inner())
+
+        outer()
+
+        phases = {phase: stats for phase, *stats in profiler.pop_tick_phases()}
+        self.assertGreaterEqual(phases['inner'][0], 0.02)
+        self.assertLess(phases['outer'][0], 0.02)
+        self.assertEqual(1, phases['outer'][1])
+        self.assertDictEqual({}, profiler.tick_phases)
+
+    def test_add_bytes_MessageCounterInPhase_BytesAddedToRunningPhase(self):
+        profiler = PhaseProfiler()
+        comm = MessageCounter(MPI.COMM_SELF, profiler.add_bytes)
+
+        result = profiler.wrap('synchronize', lambda: comm.allgather([1, 2, 3]))()
+
+        self.assertListEqual([[1, 2, 3]], result)
+        self.assertGreater(profiler.total_phases['synchronize'][2], 0)
+        self.assertEqual(1, comm.Get_size())
+
+    def test_count_BetweenSamples_LastSampleSizeCharged(self):
+        sizes = []
+        comm = MessageCounter(MPI.COMM_SELF, sizes.append, 2)
+
+        comm.allgather([1])
+        comm.allgather(list(range(100)))
+        comm.allgather(list(range(100)))
+
+        self.assertEqual(sizes[0], sizes[1])
+        self.assertLess(sizes[1], sizes[2])
+
+    def test_wrap_sender_FilledData_DataReturnedAndCounted(self):
+        sizes = []
+        comm = MessageCounter(MPI.COMM_SELF, sizes.append)
+
+        send_data = comm.wrap_sender('grid.alltoall', lambda: [[(1, (2, 3, 0))]])()
+
+        self.assertListEqual([[(1, (2, 3, 0))]], send_data)
+        self.assertEqual(1, len(sizes))
+        self.assertGreater(sizes[0], 0)
+
+class LogUtilsTests(unittest.TestCase):
+
+    def test_write_LessRowsThanFlushRows_RowsKeptInBuffer(self):
+        with tempfile.TemporaryDirectory() as directory:
+            fpath = os.path.join(directory, 'log.csv')
+            logger = BufferedLogger(MPI.COMM_WORLD, fpath, ['tick', 'value'], 'csv', 3, 100, lambda: 0)
+
+            logger.log_row(0, 1)
+            logger.log_row(0, 2)
+            logger.write()
+
+            with open(fpath) as fin:
+                self.assertEqual(1, len(fin.readlines()))
+
+    def test_write_FlushRowsReached_RowsWrittenToCsv(self):
+        with tempfile.TemporaryDirectory() as directory:
+            fpath = os.path.join(directory, 'log.csv')
+            logger = BufferedLogger(MPI.COMM_WORLD, fpath, ['tick', 'value'], 'csv', 2, 100, lambda: 0)
+
+            logger.log_row(0, 1)
+            logger.log_row(0, 2.5)
+            logger.write()
+
+            with open(fpath) as fin:
+                self.assertEqual('tick,value\n0,1\n0,2.5\n', fin.read())
+
+    def test_close_NpzFormat_ColumnsReadBackWithTypes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            fpath = os.path.join(directory, 'log.csv')
+            logger = BufferedLogger(MPI.COMM_WORLD, fpath, ['tick', 'value'], 'npz', 1, 100, lambda: 0)
+
+            logger.log_row(0.5, 1)
+            logger.write()
+            logger.log_row(1.5, 2)
+            logger.close()
+
+            columns = read_npz_log(fpath)
+            self.assertListEqual([0.5, 1.5], columns['tick'].tolist())
+            self.assertEqual(np.int64, columns['value'].dtype)
+
+    def test_init_NpzChunksOfEarlierRun_ChunksWrittenToFreeBase(self):
+        with tempfile.TemporaryDirectory() as directory:
+            fpath = os.path.join(directory, 'log.csv')
+            for rows_count in (3, 1):
+                logger = BufferedLogger(MPI.COMM_WORLD, fpath, ['tick'], 'npz', 1, 100, lambda: 0)
+                for tick in range(rows_count):
+                    logger.log_row(tick)
+                    logger.write()
+                logger.close()
+
+            self.assertEqual(os.path.join(directory, 'log_1'), logger.fpath)
+            self.assertListEqual([0, 1, 2], read_npz_log(fpath)['tick'].tolist())
+            self.assertListEqual([0], read_npz_log(os.path.join(directory, 'log_1.csv'))['tick'].tolist())
+
+    def test_read_npz_log_ChunksOfRanks_OnlyChunksOfBase(self):
+        with tempfile.TemporaryDirectory() as directory:
+            np.savez(os.path.join(directory, 'log.00000.npz'), tick=np.array([0]))
+            np.savez(os.path.join(directory, 'log.rank1.00000.npz'), tick=np.array([1]))
+
+            columns = read_npz_log(os.path.join(directory, 'log.npz'))
+
+            self.assertListEqual([0], columns['tick'].tolist())
+
+class ScheduleUtilsTests(unittest.TestCase):
+
+    def test_pop_due_workers_WorkersDueAtDifferentTicks_ReturnDueWorkersInTickOrder(self):
+        worker_scheduler = WorkerScheduler()
+        workers = [Worker(0, 0, 0, 0, 0, 0, 3.5), Worker(1, 0, 0, 0, 0, 1, 2), Worker(2, 0, 0, 0, 0, 2, 5)]
+        for worker in workers:
+            worker_scheduler.add(worker)
+
+        due_workers = worker_scheduler.pop_due_workers(4)
+
+        self.assertListEqual([workers[1], workers[0]], due_workers)
+        self.assertEqual(1, len(worker_scheduler))
+
+    def test_pop_due_workers_RetriedWorker_ReturnRetriedWorkerFirst(self):
+        worker_scheduler = WorkerScheduler()
+        workers = [Worker(0, 0, 0, 0, 0, 0, 1), Worker(1, 0, 0, 0, 0, 1, 8)]
+        worker_scheduler.add(workers[0])
+        worker_scheduler.retry(workers[1])
+
+        due_workers = worker_scheduler.pop_due_workers(1)
+
+        self.assertListEqual([workers[1], workers[0]], due_workers)
+        self.assertEqual(0, len(worker_scheduler))
+
+    def test_reschedule_WorkerMigratedAndArrived_QueueHoldsLocalWorkers(self):
+        worker_scheduler = WorkerScheduler()
+        workers = [Worker(0, 0, 0, 0, 0, 0, 1), Worker(1, 0, 0, 0, 0, 1, 2), Worker(2, 1, 0, 0, 0, 2, 1)]
+        worker_scheduler.add(workers[0])
+        worker_scheduler.retry(workers[1])
+
+        worker_scheduler.reschedule([workers[1], workers[2]])
+        due_workers = worker_scheduler.pop_due_workers(2)
+
+        self.assertListEqual([workers[1], workers[2]], due_workers)
+        self.assertEqual(0, len(worker_scheduler))
+
+
+class DistributedUtilsTests(unittest.TestCase):
+
+    def create_shared_events(self):
+        data_controller = DataController()
+        data_controller.add_data(2)
+        paths_controller = PathsController([5, 10, 15])
+        shared_events = SharedEvents(MPI.COMM_WORLD, data_controller, paths_controller)
+        paths_controller.on_connection_business_changed = shared_events.set_connection_business
+        paths_controller.try_add_path([0, 1, 2], [5, 5])
+        return shared_events, data_controller, paths_controller
+
+    def test_is_in_bounds_PointOnUpperBound_ReturnFalse(self):
+        bounds = space.BoundingBox(10, 20, 0, 5, 0, 0)
+
+        self.assertTrue(is_in_bounds(bounds, 10, 4))
+        self.assertFalse(is_in_bounds(bounds, 30, 4))
+        self.assertFalse(is_in_bounds(bounds, 10, 5))
+
+    def test_set_package_state_BeforeExchange_PackageStateApplied(self):
+        shared_events, data_controller, _ = self.create_shared_events()
+
+        shared_events.set_package_state(0, 1, 2)
+
+        self.assertEqual(2, data_controller.datas[0].packages[1].package_state)
+        self.assertEqual(1, data_controller.get_packages_count(2))
+
+    def test_set_path_unusable_BeforeAndAfterExchange_PathUnusableOnlyAfterExchange(self):
+        shared_events, _, paths_controller = self.create_shared_events()
+
+        shared_events.set_path_unusable(0)
+        self.assertEqual(1, len(paths_controller.get_paths_can_be_used()))
+
+        shared_events.exchange()
+        self.assertEqual(0, len(paths_controller.get_paths_can_be_used()))
+        self.assertEqual(0, len(shared_events.events))
+
+    def test_update_path_distances_AfterExchange_PathDistancesUpdated(self):
+        shared_events, _, paths_controller = self.create_shared_events()
+
+        shared_events.update_path_distances(0, [6, 6])
+        shared_events.exchange()
+
+        self.assertListEqual([6, 6], paths_controller.paths[0].distances)
+
+    def test_set_connection_business_PathConnectionChanged_EventRecorded(self):
+        shared_events, _, paths_controller = self.create_shared_events()
+
+        paths_controller.paths[0].set_connection_business((0, 1), True)
+
+        self.assertTrue(paths_controller.paths[0].connection_business[(0, 1)])
+        self.assertListEqual([('business', 0, (0, 1), True)], shared_events.events)
+
+
+class BalanceUtilsTests(unittest.TestCase):
+
+    def test_plan_moves_LoadsBelowThreshold_ReturnNoMoves(self):
+        load_balancer = LoadBalancer(MPI.COMM_WORLD, 1.5)
+
+        moves = load_balancer.plan_moves([(1.2, 10, 10, 0), (1.0, 10, 10, 0)])
+
+        self.assertListEqual([], moves)
+
+    def test_plan_moves_AllAgentsOnOneRank_SpreadAgentsEvenly(self):
+        load_balancer = LoadBalancer(MPI.COMM_WORLD, 1.2)
+
+        moves = load_balancer.plan_moves([(4.0, 400, 300, 100), (0, 0, 0, 0), (0, 0, 0, 0), (0, 0, 0, 0)])
+
+        self.assertListEqual([(0, 1, 100), (0, 2, 100), (0, 3, 100)], moves)
+
+    def test_get_agents_to_move_MovesFromThisRank_ReturnLastAgents(self):
+        load_balancer = LoadBalancer(MPI.COMM_WORLD, 1.2)
+        scouts = [Scout(i, 0, 0, 1, 100) for i in range(4)]
+
+        agents_to_move = load_balancer.get_agents_to_move([(0, 1, 1), (0, 2, 2), (1, 2, 5)], scouts)
+
+        self.assertListEqual([(scouts[3].uid, 1), (scouts[1].uid, 2), (scouts[2].uid, 2)], agents_to_move)
+
+
+class SweepTests(unittest.TestCase):
+
+    def test_expand_sweep_GridAndRuns_ReturnProductOfRunsAndGrid(self):
+        configs = sweep.expand_sweep({'grid': {'random.seed': [1, 2], 'drone.count': [10]},
+                                      'runs': [{'scout.count': 5}, {}]})
+
+        self.assertListEqual([{'scout.count': 5, 'random.seed': 1, 'drone.count': 10},
+                              {'scout.count': 5, 'random.seed': 2, 'drone.count': 10},
+                              {'random.seed': 1, 'drone.count': 10},
+                              {'random.seed': 2, 'drone.count': 10}], configs)
+
+    def test_expand_sweep_EmptySweep_ReturnOneDefaultConfig(self):
+        self.assertListEqual([{}], sweep.expand_sweep({}))
+
+    def test_redirect_log_files_LogFileParams_LogFilesInRunDir(self):
+        params = {'drone_log_file': 'output/drone_log.csv', 'drone.count': 10}
+
+        sweep.redirect_log_files(params, os.path.join('sweep', 'run_00001'))
+
+        self.assertEqual(os.path.join('sweep', 'run_00001', 'drone_log.csv'), params['drone_log_file'])
+        self.assertEqual(10, params['drone.count'])
+
+    def test_write_summary_InvalidAndFinishedRuns_RowsOrderedByRunId(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            fpath = os.path.join(tmp_dir, 'summary.csv')
+
+            sweep.write_summary(fpath, [{'run_id': 1, 'status': 'ok', 'tick': 10},
+                                        {'run_id': 0, 'status': 'invalid'}])
+
+            with open(fpath) as fin:
+                self.assertListEqual(['run_id,status,tick', '0,invalid,', '1,ok,10'], fin.read().splitlines())
+
+
+class BenchmarkTests(unittest.TestCase):
+
+    def test_compare_results_SlowerThanTolerance_ReturnRegression(self):
+        baseline_results = [{'benchmark': 'a', 'drones': 10, 'min_s': 1.0}, {'benchmark': 'b', 'drones': 10, 'min_s': 1.0}]
+        results = [{'benchmark': 'a', 'drones': 10, 'min_s': 1.1}, {'benchmark': 'b', 'drones': 10, 'min_s': 2.0},
+                   {'benchmark': 'b', 'drones': 20, 'min_s': 9.0}]
+
+        regressions = benchmark.compare_results(results, baseline_results, 1.25)
+
+        self.assertListEqual([results[1]], regressions)
+        self.assertNotIn('baseline_ratio', results[2])
+
+    def test_run_benchmarks_Filter_OnlyFilteredBenchmarks(self):
+        scale = {'drones': [20], 'scouts': [5], 'packages': [8]}
+
+        results = benchmark.run_benchmarks(scale, 1, 'beeadhoc.yaml', 0, 'explore')
+
+        self.assertListEqual(['scout.explore', 'scout_engine.explore'], [result['benchmark'] for result in results])
+        self.assertEqual((20, 5), (results[0]['drones'], results[0]['scouts']))
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
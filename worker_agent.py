@@ -5,6 +5,7 @@ from repast4py import core
 from distance_utils import find_agent_by_id, distance
 from drone_agent import Drone
 from path_utils import PathsController
+from serialization_utils import pack_worker
 
 
 class SendingPhase(Enum):
@@ -32,31 +33,36 @@ class Worker(core.Agent):
         self.next_tick_to_move = tick
 
         self.sending_phase = SendingPhase.SENDING_TO_END
+        # the data this worker was restored from, None once this rank owns it and may change it
+        self.restored_data = None
 
 
     def save(self) -> Tuple:
-        return (self.uid, self.path_id, self.current_drone_id,
-                self.data_id, self.package_id, self.next_tick_to_move,
-                self.way_back_distances, self.sending_phase)
+        self.restored_data = None
+        return (self.uid, pack_worker(self))
 
 
     def move_forward(self, drones, current_tick, path, speed_distances):
         if not self.current_drone_id in path.next_drones.keys():
             self.sending_phase = SendingPhase.GOING_BACK_TO_START
             back_drone_id = path.back_drones[self.current_drone_id]
-            path.connection_business[(back_drone_id, self.current_drone_id)] = False
+            path.set_connection_business((back_drone_id, self.current_drone_id), False)
             self.next_tick_to_move = current_tick + 1
             return 0
 
         next_drone_id = path.next_drones[self.current_drone_id]
         current_drone = find_agent_by_id(drones, self.current_drone_id)
         next_drone = find_agent_by_id(drones, next_drone_id)
-        distance_to_next_drone = distance(current_drone.pt, next_drone.pt)
 
         if self.current_drone_id in path.back_drones.keys():
             back_drone_id = path.back_drones[self.current_drone_id]
-            path.connection_business[(back_drone_id, self.current_drone_id)] = False
+            path.set_connection_business((back_drone_id, self.current_drone_id), False)
 
+        if current_drone is None or next_drone is None:
+            self.sending_phase = SendingPhase.STUCK
+            return -1
+
+        distance_to_next_drone = distance(current_drone.pt, next_drone.pt)
         if distance_to_next_drone > speed_distances[2]:
             self.sending_phase = SendingPhase.STUCK
             return -1
@@ -64,7 +70,7 @@ class Worker(core.Agent):
         if path.connection_business[(self.current_drone_id, next_drone_id)]:
             return -2
 
-        path.connection_business[(self.current_drone_id, next_drone_id)] = True
+        path.set_connection_business((self.current_drone_id, next_drone_id), True)
         self.current_drone_id = next_drone_id
         if distance_to_next_drone > speed_distances[0]:
             self.next_tick_to_move = current_tick + (distance_to_next_drone - speed_distances[0] + 1)
@@ -74,19 +80,23 @@ class Worker(core.Agent):
 
     def move_back(self, drones, current_tick, path, speed_distances):
         if not self.current_drone_id in path.back_drones.keys():
+            self.way_back_distances.reverse()
             self.sending_phase = SendingPhase.SENDING_ENDED
             return -3
 
         back_drone_id = path.back_drones[self.current_drone_id]
         current_drone = find_agent_by_id(drones, self.current_drone_id)
         next_drone = find_agent_by_id(drones, back_drone_id)
-        distance_to_next_drone = distance(current_drone.pt, next_drone.pt)
+        if current_drone is None or next_drone is None:
+            self.sending_phase = SendingPhase.STUCK
+            return -4
 
+        distance_to_next_drone = distance(current_drone.pt, next_drone.pt)
         if distance_to_next_drone > speed_distances[2]:
             self.sending_phase = SendingPhase.STUCK
             return -4
 
-        self.way_back_distances.insert(0, distance_to_next_drone)
+        self.way_back_distances.append(distance_to_next_drone)
         self.current_drone_id = back_drone_id
         self.next_tick_to_move = current_tick + 1
         return 0
@@ -101,6 +111,6 @@ class Worker(core.Agent):
         else:
             return -5
 
-    def get_location_point(self, context):
-        current_drone = find_agent_by_id(context.agents(Drone.TYPE), self.current_drone_id)
+    def get_location_point(self, drones):
+        current_drone = find_agent_by_id(drones, self.current_drone_id)
         return current_drone.pt
\ No newline at end of file